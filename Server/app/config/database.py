@@ -2,10 +2,15 @@ import motor.motor_asyncio
 from dotenv import load_dotenv
 import os
 
+from app.utils.metrics import mongo_command_metrics
+from app.utils.profiler import PROFILING_ENABLED, mongo_profile_listener
+
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
 
-client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI)
+# The profiling listener is only installed when profiling is enabled
+listeners = [mongo_command_metrics] + ([mongo_profile_listener] if PROFILING_ENABLED else [])
+client = motor.motor_asyncio.AsyncIOMotorClient(MONGO_URI, event_listeners=listeners)
 db = client[DB_NAME]
@@ -0,0 +1,178 @@
+"""
+Index bootstrap and query-plan verification.
+
+Indexes are declared here and created idempotently at startup. The
+diagnostic mode runs explain() on each route's canonical query and fails if
+any of them falls back to a collection scan:
+
+    python -m app.config.indexes            # create indexes
+    python -m app.config.indexes --explain  # create indexes, then verify plans
+
+Setting INDEX_DIAGNOSTICS=true runs the same verification at startup.
+"""
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from app.utils.idempotency import IDEMPOTENCY_TTL_SECONDS
+from app.utils.logger import get_logger
+
+logger = get_logger("indexes")
+
+load_dotenv()
+
+INDEX_DIAGNOSTICS = os.getenv("INDEX_DIAGNOSTICS", "false").lower() in ("1", "true", "yes", "on")
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+        # Case-insensitive login and search; accounts sharing a lowercase
+        # email have no email_lower and keep matching exactly
+        IndexModel(
+            [("email_lower", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"email_lower": {"$exists": True}},
+            name="email_lower_unique"
+        ),
+        IndexModel(
+            [("is_banned", ASCENDING)],
+            partialFilterExpression={"is_banned": True},
+            name="banned_only"
+        ),
+        # Prefix search in the admin user list
+        IndexModel([("name", ASCENDING)], name="name"),
+    ],
+    "rooms": [
+        IndexModel([("roomNumber", ASCENDING)], unique=True, name="roomNumber_unique"),
+    ],
+    "bookings": [
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("guest_email", ASCENDING), ("created_at", DESCENDING)], name="guest_email_created_at"),
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created_at"),
+        # Room number fan-out in update_room
+        IndexModel([("room_id", ASCENDING), ("created_at", DESCENDING)], name="room_id_created_at"),
+    ],
+    # Claims are keyed by "<room_id>:<night>" in _id; this index serves release
+    "room_nights": [
+        IndexModel([("booking_id", ASCENDING)], name="booking_id"),
+    ],
+    "booking_counters": [
+        IndexModel([("day", ASCENDING)], name="day"),
+    ],
+    # Stored Idempotency-Key responses expire on their own
+    "idempotency_keys": [
+        IndexModel([("created_at", ASCENDING)], expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS, name="created_at_ttl"),
+    ],
+}
+
+# Indexes this module used to declare; dropped at startup if still present
+RETIRED_INDEXES = {
+    # Overlap check replaced by room-night claims
+    "bookings": ["room_status_dates"],
+}
+
+# (name, collection, filter, sort) for the hot query of each route
+CANONICAL_QUERIES = [
+    ("auth.login", "users", {"email_lower": "guest@example.com"}, None),
+    ("auth.banned_users", "users", {"is_banned": True}, None),
+    (
+        "auth.user_search",
+        "users",
+        {"$or": [
+            {"email_lower": {"$regex": "^guest"}},
+            {"email": {"$regex": "^Guest"}},
+            {"name": {"$regex": "^Guest"}},
+        ]},
+        [("_id", DESCENDING)],
+    ),
+    ("rooms.by_number", "rooms", {"roomNumber": "101"}, None),
+    ("bookings.list", "bookings", {}, [("created_at", DESCENDING), ("_id", DESCENDING)]),
+    ("bookings.list_by_status", "bookings", {"status": "Pending"}, [("created_at", DESCENDING)]),
+    ("bookings.by_guest", "bookings", {"guest_email": "guest@example.com"}, [("created_at", DESCENDING)]),
+    ("bookings.by_room", "bookings", {"room_id": "000000000000000000000000"}, None),
+    (
+        "reservations.availability",
+        "room_nights",
+        {"_id": {"$in": ["000000000000000000000000:2030-01-01", "000000000000000000000000:2030-01-02"]}},
+        None,
+    ),
+    ("reservations.release", "room_nights", {"booking_id": "000000000000000000000000"}, None),
+    ("reports.counters", "booking_counters", {"day": {"$gte": "2030-01-01", "$lt": "2030-02-01"}}, [("day", ASCENDING)]),
+]
+
+async def ensure_indexes(db) -> dict:
+    """
+    Create every declared index and drop retired ones; existing ones are
+    left untouched
+
+    Returns:
+        Dictionary mapping collection name to created index names, or to the
+        error message if creation failed (e.g. duplicates under a unique index)
+    """
+    summary = {}
+    for collection, indexes in INDEXES.items():
+        try:
+            summary[collection] = await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            logger.error("Could not create indexes", extra={"collection": collection, "error": str(e)})
+            summary[collection] = str(e)
+    for collection, names in RETIRED_INDEXES.items():
+        existing = await db[collection].index_information()
+        for name in names:
+            if name in existing:
+                await db[collection].drop_index(name)
+                logger.info("Dropped retired index", extra={"collection": collection, "index": name})
+    return summary
+
+def plan_stages(plan) -> list:
+    """All stage names found anywhere in an explain() plan"""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+async def verify_query_plans(db) -> list:
+    """
+    Explain every canonical query
+
+    Returns:
+        One result dict per query with its winning-plan stages
+
+    Raises:
+        RuntimeError: if any query's winning plan contains a COLLSCAN
+    """
+    results = []
+    for name, collection, query, sort in CANONICAL_QUERIES:
+        cursor = db[collection].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explanation = await cursor.explain()
+        stages = plan_stages(explanation.get("queryPlanner", {}).get("winningPlan", {}))
+        results.append({"query": name, "stages": stages, "collscan": "COLLSCAN" in stages})
+
+    failures = [result["query"] for result in results if result["collscan"]]
+    if failures:
+        raise RuntimeError(f"Queries fall back to COLLSCAN: {', '.join(failures)}")
+    return results
+
+async def main(explain: bool):
+    from app.config.database import db
+
+    for collection, created in (await ensure_indexes(db)).items():
+        print(f"{collection}: {created}")
+    if explain:
+        for result in await verify_query_plans(db):
+            print(f"✅ {result['query']}: {' > '.join(result['stages'])}")
+
+if __name__ == "__main__":
+    asyncio.run(main("--explain" in sys.argv))
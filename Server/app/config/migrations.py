@@ -0,0 +1,61 @@
+"""
+One-time data migrations run at startup.
+
+Each migration is idempotent and runs before the app serves requests,
+until it has completed once; completion is recorded in the `migrations`
+collection. Several workers starting together may each run a migration,
+which is safe because re-running one changes nothing.
+
+    python -m app.config.migrations          # run pending migrations
+    python -m app.config.migrations --force  # run every migration again
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+from app.utils.logger import get_logger
+from app.utils.reservations import backfill_claims
+from app.utils.user_emails import backfill_user_emails
+
+logger = get_logger("migrations")
+
+# (name, coroutine function taking db and returning a stats dict), in order
+MIGRATIONS = [
+    # Booking creation is decided by room-night claims alone, so every
+    # active booking made before claims existed needs its claims
+    ("room_nights_backfill", backfill_claims),
+    # Login and search match emails through email_lower
+    ("users_email_lower", backfill_user_emails),
+]
+
+async def run_migrations(db, force: bool = False) -> dict:
+    """
+    Run every migration that has not completed yet
+
+    Returns:
+        Dictionary mapping migration name to its stats, or to None if it
+        had already completed
+    """
+    results = {}
+    for name, migrate in MIGRATIONS:
+        if not force and await db.migrations.find_one({"_id": name}):
+            results[name] = None
+            continue
+        stats = await migrate(db)
+        await db.migrations.update_one(
+            {"_id": name},
+            {"$set": {"completed_at": datetime.utcnow(), "stats": stats}},
+            upsert=True
+        )
+        logger.info("Migration completed", extra={"migration": name, **stats})
+        results[name] = stats
+    return results
+
+async def main(force: bool):
+    from app.config.database import db
+
+    for name, stats in (await run_migrations(db, force)).items():
+        print(f"{name}: {'already completed' if stats is None else stats}")
+
+if __name__ == "__main__":
+    asyncio.run(main("--force" in sys.argv))
@@ -1,10 +1,22 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.routes.auth import auth_router
 from app.routes.rooms import room_router
 from app.routes.bookings import booking_router
+from app.routes.admin import admin_router
 
 from app.config.database import db
+from app.config.indexes import INDEX_DIAGNOSTICS, ensure_indexes, verify_query_plans
+from app.config.migrations import run_migrations
+from app.utils.availability import availability
+from app.utils.idempotency import IdempotencyMiddleware
+from app.utils.logger import RequestIdMiddleware, configure_logging, get_logger
+from app.utils.metrics import MetricsMiddleware, registry
+from app.utils.profiler import PROFILING_ENABLED, ProfilingMiddleware
+from app.utils.responses import FastJSONResponse
+from app.utils.scheduler import SCHEDULER_ENABLED, booking_scheduler
+import asyncio
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -12,7 +24,42 @@ from dotenv import load_dotenv
 load_dotenv()
 PORT = int(os.getenv("PORT", 5000))
 
-app = FastAPI(title="Book Library API")
+configure_logging()
+logger = get_logger("main")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Declare indexes; in diagnostic mode refuse to start on a COLLSCAN plan
+    try:
+        await ensure_indexes(db)
+    except Exception as e:
+        logger.error("Could not create indexes", extra={"error": str(e)})
+    if INDEX_DIAGNOSTICS:
+        await verify_query_plans(db)
+
+    # Data migrations must finish before serving: booking creation trusts the
+    # room-night claims, so a missed backfill would allow double bookings
+    await run_migrations(db)
+
+    # Build the in-process availability index from the bookings collection
+    try:
+        await availability.load(db)
+    except Exception as e:
+        logger.error("Could not load availability index", extra={"error": str(e)})
+    reloader = asyncio.create_task(availability.run_reloader(db))
+
+    # Expire stale Pending bookings and roll room statuses (one worker at a time)
+    scheduler = asyncio.create_task(booking_scheduler.run_forever(db)) if SCHEDULER_ENABLED else None
+    yield
+    reloader.cancel()
+    if scheduler:
+        scheduler.cancel()
+
+app = FastAPI(title="Book Library API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# ✅ Idempotency-Key replay for POST /bookings/ and POST /rooms/ (innermost,
+# so replayed responses get fresh CORS and request ID headers)
+app.add_middleware(IdempotencyMiddleware)
 
 # ✅ Add CORS so React Native can connect
 app.add_middleware(
@@ -21,12 +68,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# ✅ Opt-in request profiling (X-Profile header or PROFILE_SAMPLE_RATE)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# ✅ Per-route request counts, latency and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
+# ✅ Request IDs (X-Request-ID) on every response and log record
+app.add_middleware(RequestIdMiddleware)
+
 # ✅ Register routes
 app.include_router(auth_router)
 app.include_router(room_router) 
 app.include_router(booking_router)
+app.include_router(admin_router)
 
 
 @app.get("/ping-db")
@@ -37,5 +96,9 @@ async def ping_db():
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 if __name__ == "__main__":
     uvicorn.run("app.main:app", host="0.0.0.0", port=PORT, reload=True)
\ No newline at end of file
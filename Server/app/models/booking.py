@@ -27,10 +27,21 @@ class BookingUpdate(BaseModel):
     status: Optional[Union[BookingStatus, str]] = None
     special_requests: Optional[str] = None
 
+MAX_BATCH_STATUS_UPDATES = 500
+
+class BookingStatusChange(BaseModel):
+    booking_id: str
+    status: Union[BookingStatus, str]
+
+class BatchStatusUpdate(BaseModel):
+    updates: List[BookingStatusChange] = Field(min_length=1, max_length=MAX_BATCH_STATUS_UPDATES)
+
 class BookingResponse(BaseModel):
     id: str
     room_id: str
     room_number: str
+    room_type: Optional[str] = None
+    price_per_night: Optional[float] = None
     guest_name: str
     guest_email: str
     guest_phone: str
@@ -1,6 +1,16 @@
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
+# Default guest capacity for rooms that do not set maxGuests
+ROOM_TYPE_CAPACITY = {"single": 1, "double": 2, "deluxe": 3, "suite": 4}
+DEFAULT_CAPACITY = 2
+
+def room_capacity(room: dict) -> int:
+    """Guest capacity of a room document, falling back to its room type"""
+    if room.get("maxGuests"):
+        return room["maxGuests"]
+    return ROOM_TYPE_CAPACITY.get(str(room.get("roomType", "")).lower(), DEFAULT_CAPACITY)
+
 class RoomCreate(BaseModel):
     roomNumber: str = Field(..., description="Unique room number")
     roomType: str = Field(..., description="Single, Double, Suite, Deluxe")
@@ -8,6 +18,7 @@ class RoomCreate(BaseModel):
     status: str = Field(default="Available", description="Available, Occupied, Maintenance")
     specialFeatures: List[str] = Field(default=[], description="Optional special features")
     images: List[str] = Field(default=[], description="Image URLs or paths")
+    maxGuests: Optional[int] = Field(default=None, gt=0, description="Guest capacity, defaults by room type")
 
 class RoomUpdate(BaseModel):
     roomNumber: Optional[str] = None
@@ -16,3 +27,4 @@ class RoomUpdate(BaseModel):
     status: Optional[str] = None
     specialFeatures: Optional[List[str]] = None
     images: Optional[List[str]] = None
+    maxGuests: Optional[int] = Field(default=None, gt=0)
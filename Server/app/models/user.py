@@ -3,6 +3,10 @@ from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
+def normalize_email(email: str) -> str:
+    """Case-insensitive form of an email, stored as `email_lower`"""
+    return email.strip().lower()
+
 class UserRegister(BaseModel):
     name: str
     email: EmailStr
@@ -0,0 +1,194 @@
+from fastapi import APIRouter, Depends, HTTPException, Response
+from app.config.database import db
+from app.utils.auth_handler import get_current_admin_user
+from app.utils.cache import room_catalog
+from app.utils.counters import read_counters
+from app.utils.logger import get_logger
+from app.utils.profiler import PROFILING_ENABLED, profiler
+from app.utils.scheduler import booking_scheduler
+from datetime import date, timedelta
+from typing import Optional
+import asyncio
+
+admin_router = APIRouter(prefix="/admin", tags=["Admin"])
+logger = get_logger("admin")
+
+# Length of the YYYY-MM-DD prefix that identifies each revenue period
+PERIOD_PREFIX = {"day": 10, "month": 7, "year": 4}
+
+def counts_by(field: str) -> list:
+    return [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}]
+
+def to_counts(groups: list) -> dict:
+    return {str(group["_id"]): group["count"] for group in groups}
+
+async def room_stats() -> dict:
+    result = await db.rooms.aggregate([
+        {"$facet": {
+            "by_status": counts_by("status"),
+            "total": [{"$count": "count"}],
+        }}
+    ]).to_list(length=1)
+    facets = result[0]
+    return {
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "by_status": to_counts(facets["by_status"]),
+    }
+
+async def booking_stats(today: str) -> dict:
+    result = await db.bookings.aggregate([
+        {"$facet": {
+            "by_status": counts_by("status"),
+            "occupied_rooms": [
+                {"$match": {
+                    "status": {"$in": ["Confirmed", "Checked In"]},
+                    "check_in_date": {"$lte": today},
+                    "check_out_date": {"$gt": today},
+                }},
+                {"$group": {"_id": "$room_id"}},
+                {"$count": "count"},
+            ],
+        }}
+    ]).to_list(length=1)
+    facets = result[0]
+    return {
+        "by_status": to_counts(facets["by_status"]),
+        "occupied_rooms": facets["occupied_rooms"][0]["count"] if facets["occupied_rooms"] else 0,
+    }
+
+async def revenue_series(period: str, date_from: str, date_to: str) -> list:
+    """Revenue and occupied nights per period, summed over room types"""
+    series = {}
+    for row in await read_counters(db, date_from, date_to, PERIOD_PREFIX[period]):
+        total = series.setdefault(row["period"], {"period": row["period"], "nights": 0, "revenue": 0.0})
+        total["nights"] += row["nights"]
+        total["revenue"] = round(total["revenue"] + row["revenue"], 2)
+    return list(series.values())
+
+def default_range(date_from: Optional[str], date_to: Optional[str]) -> tuple:
+    """Report range, defaulting to one year back and 90 days ahead"""
+    today = date.today()
+    return (
+        date_from or (today - timedelta(days=365)).isoformat(),
+        date_to or (today + timedelta(days=90)).isoformat(),
+    )
+
+async def user_stats() -> dict:
+    result = await db.users.aggregate([
+        {"$facet": {
+            "banned": [{"$match": {"is_banned": True}}, {"$count": "count"}],
+            "total": [{"$count": "count"}],
+        }}
+    ]).to_list(length=1)
+    facets = result[0]
+    return {
+        "total": facets["total"][0]["count"] if facets["total"] else 0,
+        "banned": facets["banned"][0]["count"] if facets["banned"] else 0,
+    }
+
+# 🔵 DASHBOARD STATISTICS (Admin only)
+@admin_router.get("/stats")
+async def get_stats(
+    period: str = "month",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """
+    Dashboard counters. Revenue is read from the materialized counters and
+    covers the nights in [date_from, date_to).
+    """
+    if period not in PERIOD_PREFIX:
+        raise HTTPException(status_code=400, detail=f"Invalid period. Valid periods: {list(PERIOD_PREFIX)}")
+
+    today = date.today().isoformat()
+    date_from, date_to = default_range(date_from, date_to)
+    try:
+        rooms, bookings, revenue, users = await asyncio.gather(
+            room_stats(), booking_stats(today), revenue_series(period, date_from, date_to), user_stats()
+        )
+    except Exception:
+        logger.exception("Error in get_stats")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    occupancy_rate = bookings["occupied_rooms"] / rooms["total"] if rooms["total"] else 0.0
+    return {
+        "success": True,
+        "data": {
+            "rooms": rooms,
+            "bookings": {"by_status": bookings["by_status"], "total": sum(bookings["by_status"].values())},
+            "revenue": {"period": period, "from": date_from, "to": date_to, "series": revenue},
+            "occupancy": {
+                "date": today,
+                "occupied_rooms": bookings["occupied_rooms"],
+                "rate": round(occupancy_rate, 4),
+            },
+            "users": users,
+        }
+    }
+
+# 🔵 OCCUPANCY AND REVENUE REPORT (Admin only)
+@admin_router.get("/reports/occupancy")
+async def get_occupancy_report(
+    period: str = "day",
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """Occupied nights and revenue per period and room type"""
+    if period not in PERIOD_PREFIX:
+        raise HTTPException(status_code=400, detail=f"Invalid period. Valid periods: {list(PERIOD_PREFIX)}")
+
+    date_from, date_to = default_range(date_from, date_to)
+    rows = await read_counters(db, date_from, date_to, PERIOD_PREFIX[period])
+    return {
+        "success": True,
+        "period": period,
+        "from": date_from,
+        "to": date_to,
+        "count": len(rows),
+        "data": rows
+    }
+
+# 🔵 SCHEDULER STATUS (Admin only)
+@admin_router.get("/scheduler")
+async def get_scheduler_stats(current_admin: dict = Depends(get_current_admin_user)):
+    """Run counts, durations and lag of this worker's booking scheduler"""
+    return {"success": True, "data": booking_scheduler.stats()}
+
+# 🔵 ROOM CACHE STATS (Admin only)
+@admin_router.get("/cache/rooms")
+async def get_room_cache_stats(current_admin: dict = Depends(get_current_admin_user)):
+    """Hit rate, size and age of this worker's room catalog cache"""
+    return {"success": True, "data": room_catalog.stats()}
+
+# 🔵 RECENT REQUEST PROFILES (Admin only)
+@admin_router.get("/profiles")
+async def list_profiles(current_admin: dict = Depends(get_current_admin_user)):
+    """Summaries of the last profiled requests, newest first"""
+    profiles = profiler.recent()
+    return {"success": True, "enabled": PROFILING_ENABLED, "count": len(profiles), "data": profiles}
+
+# 🔵 ONE PROFILE (Admin only)
+@admin_router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = "json",
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """
+    A profile as JSON, or with format=collapsed as collapsed stacks for
+    flamegraph.pl or speedscope
+    """
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return Response(
+            profile.collapsed(),
+            media_type="text/plain",
+            headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.collapsed"'}
+        )
+    if format != "json":
+        raise HTTPException(status_code=400, detail="Invalid format. Valid formats: ['json', 'collapsed']")
+    return {"success": True, "data": {**profile.summary(), "stacks": dict(profile.stacks.most_common())}}
@@ -1,14 +1,27 @@
-from fastapi import APIRouter, HTTPException, Depends
-from passlib.context import CryptContext
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from app.models.user import UserRegister, UserLogin
+from app.models.user import UserRegister, UserLogin, normalize_email
 from app.config.database import db
-from app.utils.auth_handler import create_access_token, verify_token
+from pymongo.errors import DuplicateKeyError
+from app.utils.auth_handler import banned_users, create_access_token, get_current_user
+from app.utils.logger import get_logger, sampled
+from app.utils.pagination import MAX_PAGE_SIZE, encode_cursor, id_cursor_filter
+from app.utils.passwords import PasswordPoolBusy, hash_password, pool_stats, verify_password
+from app.utils.responses import FastJSONResponse
+import re
 
 auth_router = APIRouter(prefix="/auth", tags=["Auth"])
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = get_logger("auth")
+
+def password_pool_busy() -> HTTPException:
+    logger.warning("Password pool busy", extra=pool_stats())
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-in requests, please retry shortly",
+        headers={"Retry-After": "1"}
+    )
 
 # Pydantic models for new endpoints
 class BanUserRequest(BaseModel):
@@ -25,7 +38,7 @@ class UserResponse(BaseModel):
     created_at: Optional[datetime] = None
 
 # Dependency to check if user is admin
-async def get_current_admin(token: str = Depends(verify_token)):
+async def get_current_admin(token: dict = Depends(get_current_user)):
     if token.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
     return token
@@ -33,13 +46,19 @@ async def get_current_admin(token: str = Depends(verify_token)):
 # REGISTER
 @auth_router.post("/register")
 async def register(user: UserRegister):
-    existing_user = await db["users"].find_one({"email": user.email})
+    email_lower = normalize_email(user.email)
+    existing_user = await db["users"].find_one({"$or": [{"email_lower": email_lower}, {"email": user.email}]})
     if existing_user:
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = pwd_context.hash(user.password)
+    try:
+        hashed_password = await hash_password(user.password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
     user_dict = user.dict()
     user_dict["password"] = hashed_password
+    # The email is kept as typed; lookups go through its lowercase form
+    user_dict["email_lower"] = email_lower
 
     # Ensure role is valid
     if user_dict.get("role") not in ["admin", "user"]:
@@ -51,13 +70,21 @@ async def register(user: UserRegister):
     user_dict["banned_at"] = None
     user_dict["created_at"] = datetime.utcnow()
 
-    await db["users"].insert_one(user_dict)
+    try:
+        await db["users"].insert_one(user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    logger.info("User registered", extra=sampled(role=user_dict["role"]))
     return {"message": "User registered successfully", "role": user_dict["role"]}
 
 # LOGIN
 @auth_router.post("/login")
 async def login(user: UserLogin):
-    existing_user = await db["users"].find_one({"email": user.email})
+    # Emails match case-insensitively; accounts without email_lower (not yet
+    # migrated, or sharing it with another account) match exactly
+    existing_user = await db["users"].find_one({"email_lower": normalize_email(user.email)})
+    if not existing_user:
+        existing_user = await db["users"].find_one({"email": user.email})
     if not existing_user:
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
@@ -69,11 +96,17 @@ async def login(user: UserLogin):
             detail=f"Account is banned. Reason: {ban_reason}"
         )
 
-    if not pwd_context.verify(user.password, existing_user["password"]):
+    try:
+        password_ok = await verify_password(user.password, existing_user["password"])
+    except PasswordPoolBusy:
+        raise password_pool_busy()
+    if not password_ok:
+        logger.info("Login failed", extra=sampled(reason="bad_password"))
         raise HTTPException(status_code=400, detail="Invalid email or password")
 
+    # Bookings are keyed by the stored email, whatever case was typed
     token = create_access_token({
-        "email": user.email,
+        "email": existing_user["email"],
         "role": existing_user.get("role", "user"),
         "name": existing_user.get("name", "")
     })
@@ -85,12 +118,67 @@ async def login(user: UserLogin):
         "name": existing_user.get("name", "")
     }
 
+# PASSWORD POOL STATS (Admin only)
+@auth_router.get("/password-pool")
+async def get_password_pool_stats(current_admin: dict = Depends(get_current_admin)):
+    return pool_stats()
+
+USER_PAGE_SIZE = 50
+# Only the fields of UserResponse are read
+USER_LIST_PROJECTION = {
+    "email": 1, "name": 1, "role": 1, "is_banned": 1, "ban_reason": 1, "banned_at": 1, "created_at": 1
+}
+
 # GET ALL USERS (Admin only)
 @auth_router.get("/users", response_model=List[UserResponse])
-async def get_all_users(current_admin: dict = Depends(get_current_admin)):
-    users = []
-    async for user in db["users"].find({}, {"password": 0}):  # Exclude password
-        users.append({
+async def get_all_users(
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    q: Optional[str] = Query(None, min_length=1, max_length=100),
+    banned: Optional[bool] = None,
+    current_admin: dict = Depends(get_current_admin)
+):
+    """
+    List users, newest first.
+
+    Without `limit` or `cursor` every matching user is returned. Pass them
+    to page through the list: when there are more users, the X-Next-Cursor
+    response header holds the `cursor` for the next page (USER_PAGE_SIZE
+    users per page if only `cursor` is given).
+
+    `q` matches the start of the email (case-insensitively, through
+    `email_lower`) or the name (case-sensitive, so the name index can be
+    used).
+    """
+    query = {}
+    if q:
+        q = q.strip()
+        query["$or"] = [
+            {"email_lower": {"$regex": f"^{re.escape(q.lower())}"}},
+            {"email": {"$regex": f"^{re.escape(q)}"}},
+            {"name": {"$regex": f"^{re.escape(q)}"}}
+        ]
+    if banned is True:
+        query["is_banned"] = True
+    elif banned is False:
+        query["is_banned"] = {"$ne": True}
+    if cursor:
+        query.update(id_cursor_filter(cursor))
+
+    if cursor and not limit:
+        limit = USER_PAGE_SIZE
+    find = db["users"].find(query, USER_LIST_PROJECTION).sort("_id", -1)
+    if limit:
+        find = find.limit(limit + 1)
+    raw_users = await find.to_list(length=None)
+
+    headers = {}
+    if limit and len(raw_users) > limit:
+        raw_users = raw_users[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(None, raw_users[-1]["_id"])
+
+    users = [
+        {
             "id": str(user["_id"]),
             "email": user["email"],
             "name": user.get("name", ""),
@@ -99,8 +187,11 @@ async def get_all_users(current_admin: dict = Depends(get_current_admin)):
             "ban_reason": user.get("ban_reason"),
             "banned_at": user.get("banned_at"),
             "created_at": user.get("created_at")
-        })
-    return users
+        }
+        for user in raw_users
+    ]
+    # Built to match UserResponse already; skip re-validating the page
+    return FastJSONResponse(users, headers=headers)
 
 # BAN USER (Admin only)
 @auth_router.post("/users/{user_id}/ban")
@@ -137,6 +228,8 @@ async def ban_user(
 
     if update_result.modified_count == 0:
         raise HTTPException(status_code=400, detail="Failed to ban user")
+    banned_users.add(user["email"])
+    logger.info("User banned", extra={"user_id": user_id, "admin": current_admin.get("email")})
 
     return {"message": "User banned successfully", "reason": ban_request.reason}
 
@@ -170,6 +263,8 @@ async def unban_user(
 
     if update_result.modified_count == 0:
         raise HTTPException(status_code=400, detail="Failed to unban user")
+    banned_users.discard(user["email"])
+    logger.info("User unbanned", extra={"user_id": user_id, "admin": current_admin.get("email")})
 
     return {"message": "User unbanned successfully"}
 
@@ -1,17 +1,80 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from app.config.database import db
-from app.models.booking import BookingCreate, BookingUpdate, BookingStatus
+from app.models.booking import BatchStatusUpdate, BookingCreate, BookingUpdate, BookingStatus
+from app.utils.auth_handler import get_current_admin_user
+from app.utils.availability import ACTIVE_STATUSES, availability, to_day
+from app.utils.cache import room_catalog
+from app.utils.counters import apply_booking, apply_transition, booking_delta_ops, is_counted
+from app.utils.http_cache import bump_version, conditional_response, not_modified, versioned_etag
+from app.utils.logger import get_logger, sampled
+from app.utils.pagination import MAX_PAGE_SIZE, encode_cursor, keyset_filter
+from app.utils.reservations import claim_nights, release_nights, unclaim_nights
+from app.utils.responses import dumps
 from bson import ObjectId
+from pymongo import UpdateOne
+from typing import Optional
 from datetime import datetime, timedelta
+import csv
+import io
 import math
+import uuid
 
 booking_router = APIRouter(prefix="/bookings", tags=["Bookings"])
+logger = get_logger("bookings")
+
+# Accepted spellings of each status, lowercased
+STATUS_ALIASES = {
+    'pending': 'Pending',
+    'confirmed': 'Confirmed',
+    'checked in': 'Checked In',
+    'checked_in': 'Checked In',
+    'checked out': 'Checked Out',
+    'checked_out': 'Checked Out',
+    'cancelled': 'Cancelled'
+}
+
+# Room status that follows from a booking moving to each status
+ROOM_STATUS_FOR_BOOKING = {
+    "Cancelled": "Available",
+    "Checked Out": "Available",
+    "Confirmed": "Reserved",
+    "Checked In": "Occupied",
+    "Pending": "Reserved"
+}
+
+# Transitions accepted by the batch endpoint. Re-opening a cancelled or
+# checked-out booking has to claim its nights again, so it goes through
+# PUT /bookings/{booking_id} one booking at a time.
+BATCH_TRANSITIONS = {
+    "Pending": {"Confirmed", "Checked In", "Cancelled"},
+    "Confirmed": {"Pending", "Checked In", "Cancelled"},
+    "Checked In": {"Checked Out"},
+    "Checked Out": set(),
+    "Cancelled": set()
+}
+
+def normalize_status(status_value) -> Optional[str]:
+    """
+    Proper-case booking status for any accepted spelling
+
+    Args:
+        status_value: BookingStatus or string in any case
+
+    Returns:
+        The stored status, or None if the value is not a valid status
+    """
+    if isinstance(status_value, BookingStatus):
+        status_value = status_value.value
+    return STATUS_ALIASES.get(str(status_value).lower().strip())
 
 def booking_serializer(booking, room_number: str = None) -> dict:
     return {
         "id": str(booking["_id"]),
         "room_id": booking["room_id"],
-        "room_number": room_number or booking.get("room_number", ""),
+        "room_number": room_number or booking.get("room_number") or "Unknown",
+        "room_type": booking.get("room_type"),
+        "price_per_night": booking.get("price_per_night"),
         "guest_name": booking["guest_name"],
         "guest_email": booking["guest_email"],
         "guest_phone": booking["guest_phone"],
@@ -30,94 +93,235 @@ def booking_serializer(booking, room_number: str = None) -> dict:
 @booking_router.post("/")
 async def create_booking(booking_data: BookingCreate):
     try:
+        if not ObjectId.is_valid(booking_data.room_id):
+            raise HTTPException(status_code=400, detail="Invalid room ID format")
+
+        try:
+            check_in_day = to_day(booking_data.check_in_date)
+            check_out_day = to_day(booking_data.check_out_date)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format")
+        if check_out_day <= check_in_day:
+            raise HTTPException(status_code=400, detail="Check-out date must be after check-in date")
+
         # Check if room exists and is available
-        room = await db.rooms.find_one({"_id": ObjectId(booking_data.room_id)})
+        room = await db.rooms.find_one(
+            {"_id": ObjectId(booking_data.room_id)},
+            {"roomNumber": 1, "roomType": 1, "pricePerNight": 1, "status": 1}
+        )
         if not room:
             raise HTTPException(status_code=404, detail="Room not found")
         
-        if room["status"] != "Available":
+        if room["status"] == "Maintenance":
             raise HTTPException(status_code=400, detail="Room is not available for booking")
 
-        # Check for date conflicts
-        existing_booking = await db.bookings.find_one({
-            "room_id": booking_data.room_id,
-            "status": {"$in": ["PENDING", "CONFIRMED", "CHECKED_IN"]},
-            "$or": [
-                {
-                    "check_in_date": {"$lte": booking_data.check_in_date},
-                    "check_out_date": {"$gt": booking_data.check_in_date}
-                },
-                {
-                    "check_in_date": {"$lt": booking_data.check_out_date},
-                    "check_out_date": {"$gte": booking_data.check_out_date}
-                }
-            ]
-        })
-        
-        if existing_booking:
+        # Claim every night of the stay; the unique claim ids make this the
+        # single point where concurrent requests for the same nights race
+        booking_id = ObjectId()
+        claimed = await claim_nights(
+            db, booking_data.room_id, booking_data.check_in_date, booking_data.check_out_date, booking_id
+        )
+        if not claimed:
             raise HTTPException(status_code=400, detail="Room is already booked for the selected dates")
 
         # Calculate total amount
-        check_in = datetime.strptime(booking_data.check_in_date, "%Y-%m-%d")
-        check_out = datetime.strptime(booking_data.check_out_date, "%Y-%m-%d")
-        nights = (check_out - check_in).days
+        nights = check_out_day - check_in_day
         total_amount = room["pricePerNight"] * nights
 
+        # The room's number, type and price are copied onto the booking so
+        # booking reads never have to join rooms; update_room fans out
+        # room number changes
         booking_data_dict = booking_data.dict()
         booking_data_dict.update({
+            "_id": booking_id,
+            "room_number": room["roomNumber"],
+            "room_type": room.get("roomType"),
+            "price_per_night": room["pricePerNight"],
             "total_amount": total_amount,
             "status": BookingStatus.PENDING.value,
             "created_at": datetime.now().isoformat()
         })
 
-        result = await db.bookings.insert_one(booking_data_dict)
-        
-        # Update room status to reserved
+        try:
+            await db.bookings.insert_one(booking_data_dict)
+        except Exception:
+            await release_nights(db, booking_id)
+            raise
+        availability.add_booking(booking_data_dict)
+        await bump_version(db, "bookings")
+        # The booking exists; a failed counter update only leaves the
+        # reports to be fixed by `python -m app.utils.counters rebuild`
+        try:
+            await apply_booking(db, booking_data_dict, 1, room.get("roomType"))
+        except Exception:
+            logger.exception("Could not update booking counters", extra={"booking_id": str(booking_id)})
+        
+        # Mark an idle room reserved; an Occupied room stays Occupied
         await db.rooms.update_one(
-            {"_id": ObjectId(booking_data.room_id)},
+            {"_id": ObjectId(booking_data.room_id), "status": "Available"},
             {"$set": {"status": "Reserved"}}
         )
-
-        new_booking = await db.bookings.find_one({"_id": result.inserted_id})
-        room = await db.rooms.find_one({"_id": ObjectId(booking_data.room_id)})
-        room_number = room["roomNumber"] if room else "Unknown"
+        room_catalog.invalidate()
+        logger.info("Booking created", extra=sampled(booking_id=str(booking_id), room_id=booking_data.room_id))
         
         return {
             "success": True,
             "message": "Booking created successfully", 
-            "data": booking_serializer(new_booking, room_number)
+            "data": booking_serializer(booking_data_dict)
         }
         
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ Error in create_booking: {str(e)}")
+        logger.exception("Error in create_booking")
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 # 🔵 GET ALL BOOKINGS
 @booking_router.get("/")
-async def get_all_bookings():
+async def get_all_bookings(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[BookingStatus] = None,
+    room_id: Optional[str] = None,
+    guest_email: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None
+):
+    """
+    List bookings, newest first.
+
+    Without parameters every booking is returned. Pass `limit` to page through
+    the history and send back `next_cursor` to get the following page. The
+    date range matches bookings whose stay overlaps [date_from, date_to).
+    """
     try:
+        # Unchanged since the client's copy: answer before querying
+        etag = await versioned_etag(db, request, "bookings")
+        cached = not_modified(request, etag, "bookings")
+        if cached:
+            return cached
+
+        query = {}
+        if status is not None:
+            query["status"] = status.value
+        if room_id:
+            query["room_id"] = room_id
+        if guest_email:
+            query["guest_email"] = guest_email
+        if date_from:
+            query["check_out_date"] = {"$gt": date_from}
+        if date_to:
+            query["check_in_date"] = {"$lt": date_to}
+        if cursor:
+            query.update(keyset_filter("created_at", cursor))
+
+        find = db.bookings.find(query).sort([("created_at", -1), ("_id", -1)])
+        if limit:
+            find = find.limit(limit + 1)
+        raw_bookings = await find.to_list(length=None)
+
+        next_cursor = None
+        if limit and len(raw_bookings) > limit:
+            raw_bookings = raw_bookings[:limit]
+            last = raw_bookings[-1]
+            next_cursor = encode_cursor(last["created_at"], last["_id"])
+
         bookings = []
-        async for booking in db.bookings.find().sort("created_at", -1):
+        for booking in raw_bookings:
             try:
-                room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])})
-                room_number = room["roomNumber"] if room else "Unknown"
-                bookings.append(booking_serializer(booking, room_number))
+                bookings.append(booking_serializer(booking))
             except Exception as e:
-                print(f"❌ Error processing booking {booking.get('_id')}: {e}")
+                logger.warning("Skipping malformed booking", extra={"booking_id": str(booking.get("_id")), "error": str(e)})
                 continue
         
-        return {
+        return conditional_response(request, dumps({
             "success": True,
             "count": len(bookings), 
-            "data": bookings
-        }
+            "data": bookings,
+            "next_cursor": next_cursor
+        }), "bookings", etag)
         
+    except HTTPException as he:
+        raise he
     except Exception as e:
-        print(f"❌ Error in get_all_bookings: {e}")
+        logger.exception("Error in get_all_bookings")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FIELDS = [
+    "id", "room_id", "room_number", "room_type", "price_per_night", "guest_name",
+    "guest_email", "guest_phone", "guest_address", "check_in_date", "check_out_date",
+    "total_guests", "total_amount", "status", "special_requests", "payment_method", "created_at"
+]
+
+async def export_rows(query: dict, export_format: str):
+    """
+    Stream serialized bookings straight from the cursor, one batch at a time,
+    so memory stays bounded by the batch size
+    """
+    if export_format == "csv":
+        header = io.StringIO()
+        csv.writer(header).writerow(EXPORT_FIELDS)
+        yield header.getvalue().encode()
+
+    cursor = db.bookings.find(query).sort([("created_at", 1), ("_id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    batch = []
+
+    async def flush(batch) -> bytes:
+        # Headers are already sent, so a malformed booking is skipped like
+        # in the list endpoints rather than cutting the stream short
+        rows = []
+        for booking in batch:
+            try:
+                rows.append(booking_serializer(booking))
+            except Exception as e:
+                logger.warning("Skipping malformed booking", extra={"booking_id": str(booking.get("_id")), "error": str(e)})
+        if export_format == "ndjson":
+            return b"".join(dumps(row) + b"\n" for row in rows)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+        writer.writerows(rows)
+        return buffer.getvalue().encode()
+
+    async for booking in cursor:
+        batch.append(booking)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield await flush(batch)
+            batch = []
+    if batch:
+        yield await flush(batch)
+
+# 🔵 EXPORT BOOKINGS (Admin only)
+@booking_router.get("/export")
+async def export_bookings(
+    format: str = "csv",
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_admin: dict = Depends(get_current_admin_user)
+):
+    """
+    Stream bookings created in [from, to) as CSV or NDJSON, oldest first
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format. Valid formats: {list(EXPORT_FORMATS)}")
+
+    query = {}
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lt"] = date_to
+
+    filename = f"bookings-{date_from or 'start'}-{date_to or 'now'}.{format}"
+    return StreamingResponse(
+        export_rows(query, format),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # 🔵 GET BOOKING BY ID
 @booking_router.get("/{booking_id}")
 async def get_booking(booking_id: str):
@@ -129,103 +333,73 @@ async def get_booking(booking_id: str):
         if not booking:
             raise HTTPException(status_code=404, detail="Booking not found")
         
-        room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])})
-        room_number = room["roomNumber"] if room else "Unknown"
-        
         return {
             "success": True,
-            "data": booking_serializer(booking, room_number)
+            "data": booking_serializer(booking)
         }
         
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ Error in get_booking: {e}")
+        logger.exception("Error in get_booking", extra={"booking_id": booking_id})
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # 🔵 GET USER BOOKINGS BY EMAIL
 @booking_router.get("/user/{email}")
-async def get_user_bookings(email: str):
+async def get_user_bookings(request: Request, email: str):
     try:
+        etag = await versioned_etag(db, request, "bookings")
+        cached = not_modified(request, etag, "bookings")
+        if cached:
+            return cached
+
+        raw_bookings = await db.bookings.find({"guest_email": email}).sort("created_at", -1).to_list(length=None)
         bookings = []
-        async for booking in db.bookings.find({"guest_email": email}).sort("created_at", -1):
+        for booking in raw_bookings:
             try:
-                room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])})
-                room_number = room["roomNumber"] if room else "Unknown"
-                bookings.append(booking_serializer(booking, room_number))
+                bookings.append(booking_serializer(booking))
             except Exception as e:
-                print(f"❌ Error processing booking {booking.get('_id')}: {e}")
+                logger.warning("Skipping malformed booking", extra={"booking_id": str(booking.get("_id")), "error": str(e)})
                 continue
                 
-        return {
+        return conditional_response(request, dumps({
             "success": True,
             "count": len(bookings), 
             "data": bookings
-        }
+        }), "bookings", etag)
         
     except Exception as e:
-        print(f"❌ Error in get_user_bookings: {e}")
+        logger.exception("Error in get_user_bookings")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # 🟠 UPDATE BOOKING STATUS - CASE INSENSITIVE VERSION
 @booking_router.put("/{booking_id}")
 async def update_booking(booking_id: str, update_data: BookingUpdate):
     try:
-        print(f"🔧 Starting update for booking: {booking_id}")
-        print(f"📦 Raw update data: {update_data}")
-        
         # Validate booking ID
         if not ObjectId.is_valid(booking_id):
-            error_msg = f"Invalid booking ID format: {booking_id}"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
+            raise HTTPException(status_code=400, detail=f"Invalid booking ID format: {booking_id}")
 
         # Find the booking
         booking = await db.bookings.find_one({"_id": ObjectId(booking_id)})
         if not booking:
-            error_msg = f"Booking not found: {booking_id}"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=404, detail=error_msg)
-
-        print(f"✅ Found booking: {booking['guest_name']} - Current status: {booking['status']}")
+            raise HTTPException(status_code=404, detail=f"Booking not found: {booking_id}")
 
         # Build update fields with case normalization
         update_fields = {}
         
         # Handle status field with case normalization
         if update_data.status is not None:
-            status_value = update_data.status
-            
-            # Convert to string if it's an enum
-            if isinstance(status_value, BookingStatus):
-                status_value = status_value.value
-            
             # Normalize case - accept any case but store as proper case
-            status_map = {
-                'pending': 'Pending',
-                'confirmed': 'Confirmed',
-                'checked in': 'Checked In',
-                'checked out': 'Checked Out', 
-                'cancelled': 'Cancelled',
-                'pending': 'Pending',
-                'confirmed': 'Confirmed',
-                'checked_in': 'Checked In',
-                'checked_out': 'Checked Out',
-                'cancelled': 'Cancelled'
-            }
-            
-            # Convert input to lowercase for case-insensitive matching
-            normalized_status = str(status_value).lower().strip()
-            proper_case_status = status_map.get(normalized_status)
+            proper_case_status = normalize_status(update_data.status)
             
             if proper_case_status:
                 update_fields['status'] = proper_case_status
-                print(f"🔄 Normalized status: '{status_value}' -> '{proper_case_status}'")
             else:
-                valid_statuses = list(status_map.values())
+                valid_statuses = [status.value for status in BookingStatus]
                 raise HTTPException(
                     status_code=400, 
-                    detail=f"Invalid status: '{status_value}'. Valid statuses: {valid_statuses}"
+                    detail=f"Invalid status: '{update_data.status}'. Valid statuses: {valid_statuses}"
                 )
         
         # Handle special_requests field
@@ -234,257 +408,233 @@ async def update_booking(booking_id: str, update_data: BookingUpdate):
 
         # Check if there are any fields to update
         if not update_fields:
-            error_msg = "No valid fields provided for update"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-
-        print(f"🔄 Final update fields: {update_fields}")
+            raise HTTPException(status_code=400, detail="No valid fields provided for update")
+
+        # Re-activating a cancelled or checked-out booking has to win its
+        # nights back before the status changes
+        was_active = booking["status"] in ACTIVE_STATUSES
+        now_active = update_fields.get('status', booking["status"]) in ACTIVE_STATUSES
+        claimed = False
+        if now_active and not was_active:
+            claimed = await claim_nights(
+                db, booking["room_id"], booking["check_in_date"], booking["check_out_date"], booking_id
+            )
+            if not claimed:
+                raise HTTPException(status_code=400, detail="Room is already booked for the selected dates")
+
+        # Update the booking, but only from the status the claims above were
+        # decided on; a concurrent change (scheduler expiry, batch update,
+        # another PUT) makes this request lose
+        booking_filter = {"_id": ObjectId(booking_id)}
+        if 'status' in update_fields:
+            booking_filter["status"] = booking["status"]
+        result = await db.bookings.update_one(booking_filter, {"$set": update_fields})
 
-        # Update the booking
-        result = await db.bookings.update_one(
-            {"_id": ObjectId(booking_id)},
-            {"$set": update_fields}
-        )
+        if result.matched_count == 0:
+            if claimed:
+                await unclaim_nights(
+                    db, booking["room_id"], booking["check_in_date"], booking["check_out_date"], booking_id
+                )
+            raise HTTPException(status_code=409, detail="Booking was changed by another request; try again")
 
         if result.modified_count == 0:
-            print("⚠️ No changes made to booking - might already have the same values")
+            logger.debug("No changes made to booking", extra={"booking_id": booking_id})
         else:
-            print(f"✅ Booking updated successfully: {result.modified_count} document modified")
+            await bump_version(db, "bookings")
+
+        if was_active and not now_active:
+            await release_nights(db, booking_id)
+        # The write matched the status read above, so this request made the
+        # transition and is the only one to count it
+        status_changed = 'status' in update_fields and update_fields['status'] != booking["status"]
+        if status_changed and result.modified_count:
+            try:
+                await apply_transition(db, booking, booking["status"], update_fields['status'])
+            except Exception:
+                logger.exception("Could not update booking counters", extra={"booking_id": booking_id})
 
         # Update room status based on booking status if status was updated
         if 'status' in update_fields:
-            room_status_map = {
-                "Cancelled": "Available",
-                "Checked Out": "Available",
-                "Confirmed": "Reserved", 
-                "Checked In": "Occupied",
-                "Pending": "Reserved"
-            }
-            
-            new_room_status = room_status_map.get(update_fields['status'])
+            new_room_status = ROOM_STATUS_FOR_BOOKING.get(update_fields['status'])
             if new_room_status:
-                print(f"🏨 Updating room status to: {new_room_status}")
-                room_result = await db.rooms.update_one(
+                await db.rooms.update_one(
                     {"_id": ObjectId(booking["room_id"])},
                     {"$set": {"status": new_room_status}}
                 )
-                print(f"✅ Room updated: {room_result.modified_count} rooms modified")
+                room_catalog.invalidate()
             else:
-                print(f"⚠️ No room status mapping for: {update_fields['status']}")
+                logger.warning("No room status mapping", extra={"booking_id": booking_id, "status": update_fields['status']})
 
         # Fetch updated booking
         updated_booking = await db.bookings.find_one({"_id": ObjectId(booking_id)})
         if not updated_booking:
-            error_msg = "Failed to fetch updated booking"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=500, detail=error_msg)
+            logger.error("Failed to fetch updated booking", extra={"booking_id": booking_id})
+            raise HTTPException(status_code=500, detail="Failed to fetch updated booking")
 
-        room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])})
-        room_number = room["roomNumber"] if room else "Unknown"
-        
-        response_message = "Booking updated successfully"
-        print(f"🎉 Update completed: {response_message}")
+        if 'status' in update_fields:
+            availability.add_booking(updated_booking)
+
+        logger.info("Booking updated", extra=sampled(
+            booking_id=booking_id,
+            from_status=booking["status"],
+            updated_fields=list(update_fields.keys())
+        ))
         
         return {
             "success": True,
-            "message": response_message, 
-            "data": booking_serializer(updated_booking, room_number),
+            "message": "Booking updated successfully", 
+            "data": booking_serializer(updated_booking),
             "updated_fields": list(update_fields.keys())
         }
         
     except HTTPException as he:
-        print(f"🚨 HTTPException in update_booking: {he.detail}")
         raise he
     except Exception as e:
-        error_msg = f"Internal server error: {str(e)}"
-        print(f"🚨 Exception in update_booking: {error_msg}")
-        import traceback
-        print(f"🔍 Stack trace: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=error_msg)
-    try:
-        print(f"🔧 Starting update for booking: {booking_id}")
-        print(f"📦 Raw update data: {update_data}")
-        print(f"📦 Update data dict: {update_data.dict()}")
-        
-        # Validate booking ID
-        if not ObjectId.is_valid(booking_id):
-            error_msg = f"Invalid booking ID format: {booking_id}"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-
-        # Find the booking
-        booking = await db.bookings.find_one({"_id": ObjectId(booking_id)})
-        if not booking:
-            error_msg = f"Booking not found: {booking_id}"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=404, detail=error_msg)
-
-        print(f"✅ Found booking: {booking['guest_name']} - Current status: {booking['status']}")
-
-        # Build update fields manually to handle enum/string conversion
-        update_fields = {}
-        
-        # Handle status field
-        if update_data.status is not None:
-            if isinstance(update_data.status, BookingStatus):
-                update_fields['status'] = update_data.status.value
-            else:
-                # If it's a string, validate it's a valid status
-                valid_statuses = [status.value for status in BookingStatus]
-                if update_data.status in valid_statuses:
-                    update_fields['status'] = update_data.status
-                else:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Invalid status: {update_data.status}. Valid statuses: {valid_statuses}"
-                    )
-        
-        # Handle special_requests field
-        if update_data.special_requests is not None:
-            update_fields['special_requests'] = update_data.special_requests
-
-        # Check if there are any fields to update
-        if not update_fields:
-            error_msg = "No valid fields provided for update"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-
-        print(f"🔄 Final update fields: {update_fields}")
-
-        # Update the booking
-        result = await db.bookings.update_one(
-            {"_id": ObjectId(booking_id)},
-            {"$set": update_fields}
-        )
+        logger.exception("Error in update_booking", extra={"booking_id": booking_id})
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
-        if result.modified_count == 0:
-            print("⚠️ No changes made to booking - might already have the same values")
-        else:
-            print(f"✅ Booking updated successfully: {result.modified_count} document modified")
+# 🟠 BATCH UPDATE BOOKING STATUSES
+@booking_router.post("/batch-status")
+async def batch_update_status(batch: BatchStatusUpdate):
+    """
+    Apply many status changes at once, e.g. check-ins at a shift change.
+
+    Every change is validated against BATCH_TRANSITIONS before anything is
+    written, then the bookings and rooms are updated with one bulk write
+    each. An invalid change does not stop the others; the response has a
+    result per item, in request order.
+    """
+    try:
+        results = [{"booking_id": change.booking_id, "success": False} for change in batch.updates]
+        wanted_ids = [
+            ObjectId(change.booking_id) for change in batch.updates if ObjectId.is_valid(change.booking_id)
+        ]
+        bookings = {
+            str(booking["_id"]): booking
+            async for booking in db.bookings.find({"_id": {"$in": wanted_ids}})
+        }
 
-        # Update room status based on booking status if status was updated
-        if 'status' in update_fields:
-            room_status_map = {
-                "Cancelled": "Available",
-                "Checked Out": "Available",
-                "Confirmed": "Reserved", 
-                "Checked In": "Occupied",
-                "Pending": "Reserved"
-            }
-            
-            new_room_status = room_status_map.get(update_fields['status'])
-            if new_room_status:
-                print(f"🏨 Updating room status to: {new_room_status}")
-                room_result = await db.rooms.update_one(
-                    {"_id": ObjectId(booking["room_id"])},
-                    {"$set": {"status": new_room_status}}
-                )
-                print(f"✅ Room updated: {room_result.modified_count} rooms modified")
+        # Validate in memory; `changes` holds (result, booking, new status)
+        changes = []
+        seen = set()
+        for result, change in zip(results, batch.updates):
+            booking = bookings.get(change.booking_id)
+            new_status = normalize_status(change.status)
+            if not ObjectId.is_valid(change.booking_id):
+                result["error"] = "Invalid booking ID format"
+            elif change.booking_id in seen:
+                result["error"] = "Booking appears more than once in the batch"
+            elif booking is None:
+                result["error"] = "Booking not found"
+            elif new_status is None:
+                result["error"] = f"Invalid status: '{change.status}'"
+            elif new_status != booking["status"] and new_status not in BATCH_TRANSITIONS.get(booking["status"], ()):
+                result["error"] = f"Cannot change a booking from {booking['status']} to {new_status}"
             else:
-                print(f"⚠️ No room status mapping for: {update_fields['status']}")
-
-        # Fetch updated booking
-        updated_booking = await db.bookings.find_one({"_id": ObjectId(booking_id)})
-        if not updated_booking:
-            error_msg = "Failed to fetch updated booking"
-            print(f"❌ {error_msg}")
-            raise HTTPException(status_code=500, detail=error_msg)
+                changes.append((result, booking, new_status))
+            seen.add(change.booking_id)
+
+        # Only write bookings still in the status they were validated
+        # against. A bulk result only counts matches, so a temporary marker
+        # tells which writes matched; it is removed again right after.
+        marker = uuid.uuid4().hex
+        operations = [
+            UpdateOne(
+                {"_id": booking["_id"], "status": booking["status"]},
+                {"$set": {"status": new_status, "status_batch": marker}}
+            )
+            for _, booking, new_status in changes
+            if new_status != booking["status"]
+        ]
+        if operations:
+            write = await db.bookings.bulk_write(operations, ordered=False)
+            marked = {"_id": {"$in": [booking["_id"] for _, booking, _ in changes]}, "status_batch": marker}
+            if write.matched_count < len(operations):
+                # Some bookings changed since they were read: find out which
+                written = {str(booking["_id"]) async for booking in db.bookings.find(marked, {"_id": 1})}
+                applied = []
+                for result, booking, new_status in changes:
+                    if new_status != booking["status"] and str(booking["_id"]) not in written:
+                        result["error"] = "Booking was changed by another request; try again"
+                    else:
+                        applied.append((result, booking, new_status))
+                changes = applied
+            await db.bookings.update_many(marked, {"$unset": {"status_batch": ""}})
+            await bump_version(db, "bookings")
+
+        # Only bookings created before room details were stored on them
+        # need their room looked up
+        room_ids = {
+            booking["room_id"] for _, booking, _ in changes
+            if not booking.get("room_type") and ObjectId.is_valid(booking["room_id"])
+        }
+        rooms = {
+            str(room["_id"]): room
+            async for room in db.rooms.find(
+                {"_id": {"$in": [ObjectId(room_id) for room_id in room_ids]}}, {"roomNumber": 1, "roomType": 1}
+            )
+        } if room_ids else {}
+
+        released = []
+        counter_operations = []
+        room_statuses = {}
+        for result, booking, new_status in changes:
+            old_status = booking["status"]
+            updated = dict(booking, status=new_status)
+            room = rooms.get(booking["room_id"])
+            result.update({
+                "success": True,
+                "previous_status": old_status,
+                "data": booking_serializer(updated, room["roomNumber"] if room else None)
+            })
+            if new_status == old_status:
+                continue
+            if old_status in ACTIVE_STATUSES and new_status not in ACTIVE_STATUSES:
+                released.append(str(booking["_id"]))
+            if is_counted(old_status) != is_counted(new_status):
+                room_type = booking.get("room_type") or (room["roomType"] if room else "Unknown")
+                counter_operations += booking_delta_ops(booking, 1 if is_counted(new_status) else -1, room_type)
+            # As with one PUT after another, the last change to a room wins
+            room_statuses[booking["room_id"]] = ROOM_STATUS_FOR_BOOKING[new_status]
+            availability.add_booking(updated)
+
+        if released:
+            await db.room_nights.delete_many({"booking_id": {"$in": released}})
+        if counter_operations:
+            try:
+                await db.booking_counters.bulk_write(counter_operations, ordered=False)
+            except Exception:
+                logger.exception("Could not update booking counters", extra={"counters": len(counter_operations)})
+        room_operations = [
+            UpdateOne({"_id": ObjectId(room_id)}, {"$set": {"status": room_status}})
+            for room_id, room_status in room_statuses.items()
+            if ObjectId.is_valid(room_id)
+        ]
+        if room_operations:
+            await db.rooms.bulk_write(room_operations, ordered=False)
+            room_catalog.invalidate()
+
+        updated_count = sum(1 for result in results if result["success"])
+        logger.info("Batch status update", extra=sampled(
+            requested=len(results),
+            updated=updated_count,
+            rooms=len(room_operations)
+        ))
 
-        room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])})
-        room_number = room["roomNumber"] if room else "Unknown"
-        
-        response_message = "Booking updated successfully"
-        print(f"🎉 Update completed: {response_message}")
-        
         return {
             "success": True,
-            "message": response_message, 
-            "data": booking_serializer(updated_booking, room_number),
-            "updated_fields": list(update_fields.keys())
+            "count": len(results),
+            "updated": updated_count,
+            "failed": len(results) - updated_count,
+            "results": results
         }
-        
+
     except HTTPException as he:
-        print(f"🚨 HTTPException in update_booking: {he.detail}")
         raise he
     except Exception as e:
-        error_msg = f"Internal server error: {str(e)}"
-        print(f"🚨 Exception in update_booking: {error_msg}")
-        import traceback
-        print(f"🔍 Stack trace: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=error_msg)  
-    try:
-        print(f"🔄 Processing update for booking: {booking_id}")
-        
-        # Validate booking ID
-        if not ObjectId.is_valid(booking_id):
-            raise HTTPException(status_code=400, detail="Invalid booking ID")
-            
-        # Check if booking exists
-        booking = await db.bookings.find_one({"_id": ObjectId(booking_id)})
-        if not booking:
-            raise HTTPException(status_code=404, detail="Booking not found")
-        
-        # Get only the fields that were provided in the request
-        update_fields = {}
-        
-        if update_data.status is not None:
-            update_fields['status'] = update_data.status.value
-        
-        if update_data.special_requests is not None:
-            update_fields['special_requests'] = update_data.special_requests
-        
-        # If no valid fields to update
-        if not update_fields:
-            raise HTTPException(status_code=400, detail="No valid fields to update")
-        
-        print(f"📝 Updating fields: {update_fields}")
-        
-        # Perform the update
-        result = await db.bookings.update_one(
-            {"_id": ObjectId(booking_id)},
-            {"$set": update_fields}
-        )
-        
-        if result.modified_count == 0:
-            return {
-                "success": True,
-                "message": "No changes made (values were already set)",
-                "data": booking_serializer(booking, "Unknown")
-            }
-        
-        # Update room status if booking status changed
-        if 'status' in update_fields:
-            room_status_map = {
-                "Cancelled": "Available",
-                "Checked Out": "Available", 
-                "Confirmed": "Reserved",
-                "Checked In": "Occupied",
-                "Pending": "Reserved"
-            }
-            
-            new_room_status = room_status_map.get(update_fields['status'])
-            if new_room_status:
-                await db.rooms.update_one(
-                    {"_id": ObjectId(booking["room_id"])},
-                    {"$set": {"status": new_room_status}}
-                )
-        
-        # Return updated booking
-        updated_booking = await db.bookings.find_one({"_id": ObjectId(booking_id)})
-        room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])})
-        room_number = room["roomNumber"] if room else "Unknown"
-        
-        return {
-            "success": True,
-            "message": "Booking updated successfully",
-            "data": booking_serializer(updated_booking, room_number)
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"❌ Error updating booking: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.exception("Error in batch_update_status")
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
 # 🔴 DELETE BOOKING
 @booking_router.delete("/{booking_id}")
 async def delete_booking(booking_id: str):
@@ -501,8 +651,17 @@ async def delete_booking(booking_id: str):
             {"_id": ObjectId(booking["room_id"])},
             {"$set": {"status": "Available"}}
         )
+        room_catalog.invalidate()
 
         await db.bookings.delete_one({"_id": ObjectId(booking_id)})
+        await bump_version(db, "bookings")
+        await release_nights(db, booking_id)
+        if is_counted(booking["status"]):
+            try:
+                await apply_booking(db, booking, -1)
+            except Exception:
+                logger.exception("Could not update booking counters", extra={"booking_id": booking_id})
+        availability.remove_booking(booking_id)
         
         return {
             "success": True,
@@ -512,5 +671,5 @@ async def delete_booking(booking_id: str):
     except HTTPException as he:
         raise he
     except Exception as e:
-        print(f"❌ Error in delete_booking: {e}")
+        logger.exception("Error in delete_booking", extra={"booking_id": booking_id})
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
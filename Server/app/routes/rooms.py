@@ -1,21 +1,20 @@
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Query, Request
 from fastapi.responses import JSONResponse
 from app.config.database import db
-from app.models.room import RoomCreate, RoomUpdate
+from app.models.room import RoomCreate, RoomUpdate, room_capacity
+from app.utils.availability import availability, to_day
+from app.utils.cache import room_catalog
+from app.utils.http_cache import bump_version, conditional_json, conditional_response
+from app.utils.logger import get_logger, sampled
+from app.utils.reservations import night_keys, release_room
+from app.utils.uploads import upload_images
 from bson import ObjectId
-import cloudinary
-import cloudinary.uploader
-import os
-
-# Load Cloudinary config from .env
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+from pymongo.errors import DuplicateKeyError
+from typing import Optional
+import asyncio
 
 room_router = APIRouter(prefix="/rooms", tags=["Rooms"])
+logger = get_logger("rooms")
 
 # Serializer helper
 def room_serializer(room) -> dict:
@@ -27,6 +26,7 @@ def room_serializer(room) -> dict:
         "status": room["status"],
         "specialFeatures": room.get("specialFeatures", []),
         "images": room.get("images", []),
+        "maxGuests": room_capacity(room),
     }
 
 # 🟢 CREATE ROOM with Images
@@ -37,6 +37,7 @@ async def create_room(
     pricePerNight: float = Form(...),
     status: str = Form("Available"),
     specialFeatures: str = Form(""),  # comma-separated string
+    maxGuests: Optional[int] = Form(None),
     images: list[UploadFile] = File(default=[])
 ):
     # Check if room number exists
@@ -44,11 +45,15 @@ async def create_room(
     if existing:
         raise HTTPException(status_code=400, detail="Room number already exists")
 
-    # Upload images to Cloudinary
-    uploaded_urls = []
-    for image in images:
-        result = cloudinary.uploader.upload(image.file)
-        uploaded_urls.append(result.get("secure_url"))
+    # Upload images to Cloudinary, concurrently and off the event loop
+    try:
+        uploaded_urls = await upload_images([image.file for image in images])
+    except asyncio.TimeoutError:
+        logger.warning("Room image upload timed out", extra={"room_number": roomNumber, "images": len(images)})
+        raise HTTPException(status_code=504, detail="Image upload timed out")
+    except Exception:
+        logger.exception("Error uploading room images", extra={"room_number": roomNumber})
+        raise HTTPException(status_code=502, detail="Image upload failed")
 
     # Convert specialFeatures string to list
     features_list = [f.strip() for f in specialFeatures.split(",") if f.strip()]
@@ -61,46 +66,238 @@ async def create_room(
         "specialFeatures": features_list,
         "images": uploaded_urls
     }
+    if maxGuests:
+        room_data["maxGuests"] = maxGuests
 
-    result = await db.rooms.insert_one(room_data)
+    try:
+        result = await db.rooms.insert_one(room_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Room number already exists")
+    room_catalog.invalidate()
+    logger.info("Room created", extra=sampled(room_id=str(result.inserted_id), images=len(uploaded_urls)))
     new_room = await db.rooms.find_one({"_id": result.inserted_id})
     return JSONResponse({"message": "Room created successfully", "data": room_serializer(new_room)})
 
+# Room catalog cache: every room, serialized, shared by the read endpoints
+async def load_room_catalog() -> list:
+    return [room_serializer(room) async for room in db.rooms.find()]
+
+room_catalog.set_loader(load_room_catalog)
+
+def catalog_view(rooms: list) -> dict:
+    return {"count": len(rooms), "data": rooms}
+
+ROOM_FIELDS = ("id", "roomNumber", "roomType", "pricePerNight", "status", "specialFeatures", "images", "maxGuests")
+# Most rooms one ?ids= request may ask for
+MAX_ROOM_IDS = 200
+
+def parse_fields(fields: Optional[str]) -> Optional[list]:
+    """Fields requested with ?fields=a,b (id is always included), or None for all"""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in ROOM_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {unknown}. Valid fields: {list(ROOM_FIELDS)}")
+    return ["id"] + [f for f in requested if f != "id"]
+
+def project(room: dict, fields: Optional[list]) -> dict:
+    return room if fields is None else {field: room[field] for field in fields}
+
+async def find_rooms(room_ids: list) -> dict:
+    """
+    Serialized rooms by id, from the catalog cache when it is enabled
+
+    Returns:
+        Dictionary mapping each found room id to its serialized room
+    """
+    if room_catalog.enabled:
+        snapshot = await room_catalog.get()
+        return {room_id: snapshot.by_id[room_id] for room_id in room_ids if room_id in snapshot.by_id}
+    object_ids = [ObjectId(room_id) for room_id in room_ids if ObjectId.is_valid(room_id)]
+    if not object_ids:
+        return {}
+    return {str(room["_id"]): room_serializer(room) async for room in db.rooms.find({"_id": {"$in": object_ids}})}
+
+def available_view(rooms: list) -> dict:
+    return catalog_view([room for room in rooms if room["status"] == "Available"])
+
 # 🔵 GET ALL ROOMS
 @room_router.get("/")
-async def get_all_rooms():
-    rooms = []
-    async for room in db.rooms.find():
-        rooms.append(room_serializer(room))
-    return {"count": len(rooms), "data": rooms}
+async def get_all_rooms(request: Request, ids: Optional[str] = None, fields: Optional[str] = None):
+    """
+    Every room, or with ids=a,b,c only those rooms (in that order; ids that
+    match no room are listed under "missing"). fields=a,b trims each room
+    to the given fields.
+    """
+    selected = parse_fields(fields)
+    if ids is not None:
+        room_ids = list(dict.fromkeys(i.strip() for i in ids.split(",") if i.strip()))
+        if len(room_ids) > MAX_ROOM_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {MAX_ROOM_IDS} ids per request")
+        found = await find_rooms(room_ids)
+        rooms = [project(found[room_id], selected) for room_id in room_ids if room_id in found]
+        missing = [room_id for room_id in room_ids if room_id not in found]
+        return conditional_json(request, {**catalog_view(rooms), "missing": missing}, "rooms")
+
+    snapshot = await room_catalog.get()
+    if selected is not None:
+        return conditional_json(request, catalog_view([project(room, selected) for room in snapshot.items]), "rooms")
+    body, etag = snapshot.render("all", catalog_view)
+    return conditional_response(request, body, "rooms", etag)
 
 # 🔵 GET AVAILABLE ROOMS
 @room_router.get("/available")
-async def get_available_rooms():
-    rooms = []
-    async for room in db.rooms.find({"status": "Available"}):
-        rooms.append(room_serializer(room))
-    return {"count": len(rooms), "data": rooms}
+async def get_available_rooms(
+    request: Request,
+    check_in: Optional[str] = None,
+    check_out: Optional[str] = None,
+    guests: Optional[int] = Query(None, gt=0),
+    room_type: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    features: Optional[str] = None  # comma-separated, all required
+):
+    """
+    Search bookable rooms.
+
+    With check_in/check_out, returns every room outside maintenance that has
+    no active booking overlapping those nights (answered by the in-process
+    availability index). Without dates, returns rooms whose status is
+    currently "Available", as before. Filtering runs over the cached catalog.
+    """
+    if (check_in is None) != (check_out is None):
+        raise HTTPException(status_code=400, detail="check_in and check_out must be provided together")
+
+    if check_in:
+        try:
+            to_day(check_in)
+            to_day(check_out)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format")
+        if check_out <= check_in:
+            raise HTTPException(status_code=400, detail="Check-out date must be after check-in date")
+
+    snapshot = await room_catalog.get()
+    required_features = [f.strip() for f in (features or "").split(",") if f.strip()]
+    if not (check_in or guests or room_type or required_features
+            or min_price is not None or max_price is not None):
+        body, etag = snapshot.render("available", available_view)
+        return conditional_response(request, body, "rooms_available", etag)
+
+    room_type = room_type.lower() if room_type else None
+    candidates = []
+    for room in snapshot.items:
+        if check_in:
+            if room["status"] == "Maintenance":
+                continue
+        elif room["status"] != "Available":
+            continue
+        if room_type and str(room["roomType"]).lower() != room_type:
+            continue
+        if min_price is not None and room["pricePerNight"] < min_price:
+            continue
+        if max_price is not None and room["pricePerNight"] > max_price:
+            continue
+        if guests and room["maxGuests"] < guests:
+            continue
+        if required_features and not set(required_features).issubset(room["specialFeatures"]):
+            continue
+        candidates.append(room)
+
+    if check_in:
+        free_ids = set(availability.free_rooms([room["id"] for room in candidates], check_in, check_out))
+        candidates = [room for room in candidates if room["id"] in free_ids]
+
+    return conditional_json(request, catalog_view(candidates), "rooms_available")
+
+# 🔵 GET ROOM BY ID
+@room_router.get("/{room_id}")
+async def get_room(request: Request, room_id: str, fields: Optional[str] = None):
+    selected = parse_fields(fields)
+    if not ObjectId.is_valid(room_id):
+        raise HTTPException(status_code=400, detail="Invalid room ID format")
+    room = (await find_rooms([room_id])).get(room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return conditional_json(request, {"data": project(room, selected)}, "rooms")
+
+# 🔵 CHECK ROOM AVAILABILITY FOR A DATE RANGE
+@room_router.get("/{room_id}/availability")
+async def get_room_availability(room_id: str, check_in: str, check_out: str):
+    if not ObjectId.is_valid(room_id):
+        raise HTTPException(status_code=400, detail="Invalid room ID format")
+    try:
+        to_day(check_in)
+        to_day(check_out)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Dates must use the YYYY-MM-DD format")
+    if check_out <= check_in:
+        raise HTTPException(status_code=400, detail="Check-out date must be after check-in date")
+
+    if not await db.rooms.find_one({"_id": ObjectId(room_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Room not found")
+
+    # Ask the room-night claims rather than the in-process index, which can
+    # lag behind cancellations made by other workers
+    night_ids = [night["_id"] for night in night_keys(room_id, check_in, check_out)]
+    taken = await db.room_nights.find_one({"_id": {"$in": night_ids}}, {"_id": 1})
+    available = taken is None
+    return {
+        "room_id": room_id,
+        "check_in": check_in,
+        "check_out": check_out,
+        "available": available
+    }
 
 # 🟠 UPDATE ROOM
 @room_router.put("/{room_id}")
 async def update_room(room_id: str, update_data: RoomUpdate):
+    if not ObjectId.is_valid(room_id):
+        raise HTTPException(status_code=400, detail="Invalid room ID format")
     room = await db.rooms.find_one({"_id": ObjectId(room_id)})
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
 
-    await db.rooms.update_one(
-        {"_id": ObjectId(room_id)}, 
-        {"$set": update_data.dict(exclude_unset=True)}
-    )
+    changes = update_data.dict(exclude_unset=True)
+    try:
+        await db.rooms.update_one(
+            {"_id": ObjectId(room_id)}, 
+            {"$set": changes}
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Room number already exists")
+    room_catalog.invalidate()
+
+    # Bookings keep a copy of the room number for display. Type and price
+    # stay as they were when the room was booked.
+    if changes.get("roomNumber") and changes["roomNumber"] != room["roomNumber"]:
+        result = await db.bookings.update_many(
+            {"room_id": room_id},
+            {"$set": {"room_number": changes["roomNumber"]}}
+        )
+        if result.modified_count:
+            await bump_version(db, "bookings")
+        logger.info("Room number copied to bookings", extra={
+            "room_id": room_id,
+            "room_number": changes["roomNumber"],
+            "bookings": result.modified_count
+        })
+
     updated = await db.rooms.find_one({"_id": ObjectId(room_id)})
     return {"message": "Room updated successfully", "data": room_serializer(updated)}
 
 # 🔴 DELETE ROOM
 @room_router.delete("/{room_id}")
 async def delete_room(room_id: str):
+    if not ObjectId.is_valid(room_id):
+        raise HTTPException(status_code=400, detail="Invalid room ID format")
     room = await db.rooms.find_one({"_id": ObjectId(room_id)})
     if not room:
         raise HTTPException(status_code=404, detail="Room not found")
     await db.rooms.delete_one({"_id": ObjectId(room_id)})
+    # Its claims and availability entries would otherwise outlive the room
+    await release_room(db, room_id)
+    availability.remove_room(room_id)
+    room_catalog.invalidate()
     return {"message": "Room deleted successfully"}
@@ -1,17 +1,99 @@
 import jwt
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from fastapi import HTTPException, Depends, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
+from app.config.database import db
 import os
 
 load_dotenv()
 SECRET_KEY = os.getenv("JWT_SECRET", "your-fallback-secret-key-change-in-production")
 ALGORITHM = "HS256"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+BANNED_USERS_TTL_SECONDS = float(os.getenv("BANNED_USERS_TTL_SECONDS", 30))
 
 # Create HTTPBearer for token extraction
 security = HTTPBearer()
 
+class VerifiedTokenCache:
+    """
+    Bounded LRU of already-verified tokens, keyed by the token's SHA-256.
+
+    Entries are dropped when their `exp` passes, so a cached token is never
+    accepted for longer than the token itself is valid.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str):
+        key = self._key(token)
+        payload = self._entries.get(key)
+        if payload is None:
+            return None
+        if payload.get("exp", 0) <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def put(self, token: str, payload: dict):
+        key = self._key(token)
+        self._entries[key] = payload
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class BannedUsers:
+    """
+    Emails of banned users, reloaded from the database every `ttl` seconds.
+
+    Ban and unban in this process update the set immediately; other workers
+    pick the change up on their next reload.
+    """
+
+    def __init__(self, ttl: float = BANNED_USERS_TTL_SECONDS):
+        self.ttl = ttl
+        self._emails = set()
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    async def _refresh(self):
+        async with self._lock:
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            emails = set()
+            async for user in db["users"].find({"is_banned": True}, {"email": 1}):
+                emails.add(user["email"].lower())
+            self._emails = emails
+            self._loaded_at = time.monotonic()
+
+    async def contains(self, email: str) -> bool:
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl:
+            await self._refresh()
+        return bool(email) and email.lower() in self._emails
+
+    def add(self, email: str):
+        self._emails.add(email.lower())
+
+    def discard(self, email: str):
+        self._emails.discard(email.lower())
+
+verified_tokens = VerifiedTokenCache()
+banned_users = BannedUsers()
+
 def create_access_token(data: dict, expires_delta: int = 60):
     """
     Create a JWT access token
@@ -35,8 +117,12 @@ def decode_access_token(token: str):
     Returns:
         Decoded token payload if valid, None otherwise
     """
+    payload = verified_tokens.get(token)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        verified_tokens.put(token, payload)
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -77,11 +163,25 @@ def verify_token_string(token: str):
         )
     return payload
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     FastAPI dependency to get current user from JWT token
+
+    The principal is resolved once per request and kept on request.state;
+    banned users are rejected even while their token is still valid.
     """
-    return verify_token(credentials)
+    principal = getattr(request.state, "principal", None)
+    if principal is not None:
+        return principal
+
+    principal = verify_token(credentials)
+    if await banned_users.contains(principal.get("email")):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Account is banned"
+        )
+    request.state.principal = principal
+    return principal
 
 async def get_current_active_user(current_user: dict = Depends(get_current_user)):
     """
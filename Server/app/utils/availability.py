@@ -0,0 +1,168 @@
+import asyncio
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from app.utils.logger import get_logger
+
+logger = get_logger("availability")
+
+# Booking statuses that hold a room for their dates
+ACTIVE_STATUSES = ("Pending", "Confirmed", "Checked In")
+
+# How often every worker reloads the index to pick up other workers' writes
+RELOAD_INTERVAL_SECONDS = int(os.getenv("AVAILABILITY_RELOAD_SECONDS", 300))
+
+def to_day(value: str) -> int:
+    """
+    Convert a YYYY-MM-DD string to a day number (proleptic ordinal)
+
+    Raises:
+        ValueError: if the string is not a valid ISO date
+    """
+    return date.fromisoformat(value).toordinal()
+
+class RoomIntervals:
+    """
+    Half-open [check_in, check_out) stays of one room, sorted by check-in.
+
+    `max_ends[i]` is the latest check-out among the first i+1 stays, so an
+    overlap query is a single bisect regardless of how the stays overlap
+    each other (legacy data may contain double bookings).
+    """
+
+    __slots__ = ("starts", "ends", "ids", "max_ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_ends = []
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _recompute_from(self, position: int):
+        running = self.max_ends[position - 1] if position > 0 else None
+        for i in range(position, len(self.ends)):
+            running = self.ends[i] if running is None else max(running, self.ends[i])
+            self.max_ends[i] = running
+
+    def add(self, start: int, end: int, booking_id: str):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, booking_id)
+        self.max_ends.insert(position, end)
+        self._recompute_from(position)
+
+    def remove(self, booking_id: str) -> bool:
+        try:
+            position = self.ids.index(booking_id)
+        except ValueError:
+            return False
+        del self.starts[position]
+        del self.ends[position]
+        del self.ids[position]
+        del self.max_ends[position]
+        self._recompute_from(position)
+        return True
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True if any stored stay intersects [start, end)"""
+        candidates = bisect_left(self.starts, end)
+        return candidates > 0 and self.max_ends[candidates - 1] > start
+
+class AvailabilityIndex:
+    """
+    In-process per-room interval index over the active bookings.
+
+    The index is loaded from the `bookings` collection at startup and kept in
+    sync by the booking routes of this process. Writes made by other workers
+    only show up after the next periodic reload, so the index only narrows
+    room searches; booking creation and the per-room availability check go
+    by the room-night claims.
+    """
+
+    def __init__(self):
+        self._rooms = {}
+        self._booking_rooms = {}
+        self.loaded = False
+
+    async def load(self, db):
+        """Rebuild the index from every active booking in the database"""
+        rooms = {}
+        booking_rooms = {}
+        cursor = db.bookings.find(
+            {"status": {"$in": list(ACTIVE_STATUSES)}},
+            {"room_id": 1, "check_in_date": 1, "check_out_date": 1}
+        )
+        async for booking in cursor:
+            try:
+                start = to_day(booking["check_in_date"])
+                end = to_day(booking["check_out_date"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            booking_id = str(booking["_id"])
+            rooms.setdefault(booking["room_id"], RoomIntervals()).add(start, end, booking_id)
+            booking_rooms[booking_id] = booking["room_id"]
+
+        self._rooms = rooms
+        self._booking_rooms = booking_rooms
+        self.loaded = True
+
+    async def run_reloader(self, db, interval: int = RELOAD_INTERVAL_SECONDS):
+        """Reload the index every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.load(db)
+            except Exception:
+                logger.exception("Could not reload availability index")
+
+    def add_booking(self, booking: dict):
+        """Track a booking, replacing any previous entry for the same id"""
+        booking_id = str(booking["_id"])
+        self.remove_booking(booking_id)
+        if booking.get("status") not in ACTIVE_STATUSES:
+            return
+        try:
+            start = to_day(booking["check_in_date"])
+            end = to_day(booking["check_out_date"])
+        except (KeyError, TypeError, ValueError):
+            return
+        room_id = booking["room_id"]
+        self._rooms.setdefault(room_id, RoomIntervals()).add(start, end, booking_id)
+        self._booking_rooms[booking_id] = room_id
+
+    def remove_booking(self, booking_id: str):
+        """Stop tracking a booking (cancelled, checked out or deleted)"""
+        room_id = self._booking_rooms.pop(str(booking_id), None)
+        if room_id is None:
+            return
+        intervals = self._rooms.get(room_id)
+        if intervals is not None:
+            intervals.remove(str(booking_id))
+            if not intervals:
+                del self._rooms[room_id]
+
+    def remove_room(self, room_id: str):
+        """Stop tracking every booking of a deleted room"""
+        intervals = self._rooms.pop(room_id, None)
+        if intervals is None:
+            return
+        for booking_id in intervals.ids:
+            self._booking_rooms.pop(booking_id, None)
+
+    def free_rooms(self, room_ids, check_in: str, check_out: str) -> list:
+        """Filter room ids down to the ones free for [check_in, check_out)"""
+        start = to_day(check_in)
+        end = to_day(check_out)
+        free = []
+        for room_id in room_ids:
+            intervals = self._rooms.get(room_id)
+            if intervals is None or not intervals.overlaps(start, end):
+                free.append(room_id)
+        return free
+
+availability = AvailabilityIndex()
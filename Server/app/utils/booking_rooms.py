@@ -0,0 +1,112 @@
+"""
+Room details stored on bookings.
+
+New bookings carry a copy of their room's number, type and nightly price
+(`room_number`, `room_type`, `price_per_night`), so booking reads never
+query `rooms`. update_room copies a changed room number to the room's
+bookings; type and price keep the values the room had when it was booked.
+
+Bookings created before these fields existed, or whose room number missed
+a fan-out, are brought up to date with:
+
+    python -m app.utils.booking_rooms check     # report only
+    python -m app.utils.booking_rooms backfill  # report, then update
+
+The backfill can be run again at any time; bookings that are already up to
+date are left untouched.
+"""
+import asyncio
+import sys
+from datetime import date
+
+from pymongo import UpdateOne
+
+from app.utils.http_cache import bump_version
+
+BATCH_SIZE = 1000
+
+def missing_room_fields(booking: dict, room: dict) -> dict:
+    """
+    Fields to set on a booking to bring its copy of the room up to date
+
+    The room number always follows the room. Type and price are only filled
+    in when missing; the price is taken from what the guest paid if the
+    stay dates allow it.
+    """
+    fields = {}
+    if booking.get("room_number") != room["roomNumber"]:
+        fields["room_number"] = room["roomNumber"]
+    if not booking.get("room_type"):
+        fields["room_type"] = room.get("roomType")
+    if booking.get("price_per_night") is None:
+        try:
+            nights = (date.fromisoformat(booking["check_out_date"]) - date.fromisoformat(booking["check_in_date"])).days
+        except (KeyError, TypeError, ValueError):
+            nights = 0
+        if nights > 0 and booking.get("total_amount") is not None:
+            fields["price_per_night"] = round(booking["total_amount"] / nights, 2)
+        else:
+            fields["price_per_night"] = room.get("pricePerNight")
+    return fields
+
+async def backfill_room_fields(db, dry_run: bool = False) -> dict:
+    """
+    Copy room details onto every booking that lacks them or has a stale
+    room number
+
+    Args:
+        db: Database handle
+        dry_run: Only count the bookings that would change
+
+    Returns:
+        Counts of bookings scanned, updated (or to update) and whose room no
+        longer exists
+    """
+    rooms = {}
+    async for room in db.rooms.find({}, {"roomNumber": 1, "roomType": 1, "pricePerNight": 1}):
+        rooms[str(room["_id"])] = room
+
+    stats = {"bookings": 0, "updated": 0, "missing_room": 0}
+    operations = []
+    cursor = db.bookings.find({}, {
+        "room_id": 1, "room_number": 1, "room_type": 1, "price_per_night": 1,
+        "check_in_date": 1, "check_out_date": 1, "total_amount": 1
+    }).batch_size(BATCH_SIZE)
+    async for booking in cursor:
+        stats["bookings"] += 1
+        room = rooms.get(booking.get("room_id"))
+        if room is None:
+            stats["missing_room"] += 1
+            continue
+        fields = missing_room_fields(booking, room)
+        if not fields:
+            continue
+        stats["updated"] += 1
+        if dry_run:
+            continue
+        operations.append(UpdateOne({"_id": booking["_id"]}, {"$set": fields}))
+        if len(operations) == BATCH_SIZE:
+            await db.bookings.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.bookings.bulk_write(operations, ordered=False)
+    if stats["updated"] and not dry_run:
+        await bump_version(db, "bookings")
+    return stats
+
+async def main(command: str) -> int:
+    from app.config.database import db
+
+    if command not in ("check", "backfill"):
+        print(__doc__)
+        return 2
+
+    stats = await backfill_room_fields(db, dry_run=command == "check")
+    action = "needed updating" if command == "check" else "updated"
+    print(f"{stats['updated']} of {stats['bookings']} bookings {action}")
+    if stats["missing_room"]:
+        print(f"⚠️ {stats['missing_room']} bookings reference a room that no longer exists")
+    return 1 if stats["updated"] and command == "check" else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "")))
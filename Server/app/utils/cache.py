@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+
+from dotenv import load_dotenv
+
+from app.utils.http_cache import make_etag
+from app.utils.metrics import registry
+from app.utils.responses import dumps
+
+load_dotenv()
+
+ROOM_CACHE_ENABLED = os.getenv("ROOM_CACHE_ENABLED", "true").lower() not in ("0", "false", "no", "off")
+ROOM_CACHE_TTL_SECONDS = float(os.getenv("ROOM_CACHE_TTL_SECONDS", 30))
+
+class CatalogSnapshot:
+    """
+    Serialized copy of a collection, plus response bodies rendered from it.
+
+    Args:
+        items: Serialized documents (each with an "id" key)
+    """
+
+    def __init__(self, items: list):
+        self.items = items
+        self.by_id = {item["id"]: item for item in items}
+        self.loaded_at = time.monotonic()
+        # Memory estimate: the items' JSON size, measured once per load
+        self.items_bytes = len(dumps(items))
+        self._payloads = {}
+
+    def render(self, key: str, build) -> tuple:
+        """
+        Response body and ETag for `key`, rendered once per snapshot
+
+        Args:
+            key: Name of the rendered view
+            build: Callable returning the JSON-serializable response body
+
+        Returns:
+            Tuple of (body bytes, ETag)
+        """
+        rendered = self._payloads.get(key)
+        if rendered is None:
+            body = dumps(build(self.items))
+            rendered = self._payloads[key] = (body, make_etag(body))
+        return rendered
+
+    def rendered_bytes(self) -> int:
+        """Size of the response bodies rendered so far (not of the items)"""
+        return sum(len(body) for body, _ in self._payloads.values())
+
+class CatalogCache:
+    """
+    In-process read-through cache of a small, rarely written collection.
+
+    Entries expire after `ttl` seconds and are dropped by `invalidate()` on
+    every write made by this process; other workers see the change once
+    their own copy expires. Concurrent misses share a single load.
+
+    Args:
+        name: Name used in stats
+        ttl: Seconds a snapshot stays fresh
+        enabled: When False every call loads from the database
+    """
+
+    def __init__(self, name: str, ttl: float = ROOM_CACHE_TTL_SECONDS, enabled: bool = ROOM_CACHE_ENABLED):
+        self.name = name
+        self.ttl = ttl
+        self.enabled = enabled
+        self._loader = None
+        self._snapshot = None
+        self._inflight = None
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._loads = 0
+
+    def set_loader(self, loader):
+        """Register the coroutine function that returns the serialized items"""
+        self._loader = loader
+
+    async def _load(self) -> CatalogSnapshot:
+        self._loads += 1
+        return CatalogSnapshot(await self._loader())
+
+    async def get(self) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl:
+            self._hits += 1
+            return snapshot
+
+        self._misses += 1
+        if not self.enabled:
+            return await self._load()
+
+        # Single flight: later misses wait on the load already in progress
+        if self._inflight is not None:
+            return await asyncio.shield(self._inflight)
+
+        generation = self._generation
+        load = self._inflight = asyncio.ensure_future(self._load())
+        try:
+            snapshot = await asyncio.shield(load)
+        finally:
+            if self._inflight is load:
+                self._inflight = None
+        if generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self):
+        """Drop the cached snapshot after a write"""
+        self._generation += 1
+        self._snapshot = None
+        # A load started before the write may return stale data; don't join it
+        self._inflight = None
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        snapshot = self._snapshot
+        return {
+            "name": self.name,
+            "enabled": self.enabled,
+            "ttl_seconds": self.ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "loads": self._loads,
+            "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            "items": len(snapshot.items) if snapshot else 0,
+            "items_bytes": snapshot.items_bytes if snapshot else 0,
+            "rendered_payload_bytes": snapshot.rendered_bytes() if snapshot else 0,
+            "age_seconds": round(time.monotonic() - snapshot.loaded_at, 2) if snapshot else None,
+        }
+
+    def metrics(self) -> list:
+        """Samples for the metrics registry"""
+        stats = self.stats()
+        prefix = f"{self.name}_cache"
+        return [
+            (f"{prefix}_hits_total", "counter", "Cache lookups served from memory", stats["hits"]),
+            (f"{prefix}_misses_total", "counter", "Cache lookups that waited for a load", stats["misses"]),
+            (f"{prefix}_loads_total", "counter", "Loads from the database", stats["loads"]),
+            (f"{prefix}_items", "gauge", "Items in the current snapshot", stats["items"]),
+            (f"{prefix}_items_bytes", "gauge", "JSON size of the items in the current snapshot", stats["items_bytes"]),
+            (f"{prefix}_age_seconds", "gauge", "Age of the current snapshot", stats["age_seconds"]),
+        ]
+
+room_catalog = CatalogCache("rooms")
+registry.add_collector(room_catalog.metrics)
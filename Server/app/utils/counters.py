@@ -0,0 +1,209 @@
+"""
+Materialized occupancy and revenue counters.
+
+`booking_counters` holds one document per (day, room type) with the
+occupied nights and the revenue earned that night. The booking routes apply
+a delta right after every write that changes whether a booking counts, so
+reports read O(days) documents instead of scanning `bookings`.
+
+Recompute the counters from the bookings and compare them with the stored
+values:
+
+    python -m app.utils.counters check    # report differences only
+    python -m app.utils.counters rebuild  # report, then replace the counters
+"""
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from bson import ObjectId
+from pymongo import ReplaceOne, UpdateOne
+
+BATCH_SIZE = 1000
+
+# Every booking that has not been cancelled counts towards occupancy
+UNCOUNTED_STATUSES = ("Cancelled",)
+
+def is_counted(status: str) -> bool:
+    return status not in UNCOUNTED_STATUSES
+
+def stay_nights(booking: dict) -> list:
+    """The YYYY-MM-DD date of each night of a booking's stay"""
+    night = date.fromisoformat(booking["check_in_date"])
+    last = date.fromisoformat(booking["check_out_date"])
+    nights = []
+    while night < last:
+        nights.append(night.isoformat())
+        night += timedelta(days=1)
+    return nights
+
+def counter_id(day: str, room_type: str) -> str:
+    return f"{day}:{room_type}"
+
+async def booking_room_type(db, booking: dict) -> str:
+    """Room type of a booking, looked up on the room if not stored on it"""
+    if booking.get("room_type"):
+        return booking["room_type"]
+    room = None
+    if ObjectId.is_valid(booking.get("room_id", "")):
+        room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])}, {"roomType": 1})
+    return room["roomType"] if room else "Unknown"
+
+def booking_delta_ops(booking: dict, sign: int, room_type: str) -> list:
+    """
+    Counter updates that add (sign=1) or remove (sign=-1) a booking's
+    nights and revenue, ready for bulk_write
+    """
+    try:
+        nights = stay_nights(booking)
+    except (KeyError, TypeError, ValueError):
+        return []
+    if not nights:
+        return []
+
+    nightly_revenue = booking.get("total_amount", 0) / len(nights)
+    return [
+        UpdateOne(
+            {"_id": counter_id(night, room_type)},
+            {
+                "$inc": {"nights": sign, "revenue": sign * nightly_revenue},
+                "$setOnInsert": {"day": night, "room_type": room_type},
+            },
+            upsert=True
+        )
+        for night in nights
+    ]
+
+async def apply_booking(db, booking: dict, sign: int, room_type: str = None):
+    """
+    Add (sign=1) or remove (sign=-1) a booking's nights and revenue
+
+    Args:
+        db: Database handle
+        booking: Booking document
+        sign: 1 to count the booking, -1 to uncount it
+        room_type: Room type, looked up if omitted
+    """
+    room_type = room_type or await booking_room_type(db, booking)
+    operations = booking_delta_ops(booking, sign, room_type)
+    if operations:
+        await db.booking_counters.bulk_write(operations, ordered=False)
+
+async def apply_transition(db, booking: dict, old_status: str, new_status: str, room_type: str = None):
+    """Update the counters for a booking moving from old_status to new_status"""
+    if is_counted(old_status) and not is_counted(new_status):
+        await apply_booking(db, booking, -1, room_type)
+    elif not is_counted(old_status) and is_counted(new_status):
+        await apply_booking(db, booking, 1, room_type)
+
+async def read_counters(db, date_from: str, date_to: str, period_prefix: int = 10) -> list:
+    """
+    Nights and revenue per period and room type for days in [date_from, date_to)
+
+    Args:
+        period_prefix: Length of the YYYY-MM-DD prefix that names a period
+            (10 for days, 7 for months, 4 for years)
+    """
+    series = {}
+    cursor = db.booking_counters.find({"day": {"$gte": date_from, "$lt": date_to}}).sort("day", 1)
+    async for counter in cursor:
+        key = (counter["day"][:period_prefix], counter["room_type"])
+        row = series.setdefault(key, {"period": key[0], "room_type": key[1], "nights": 0, "revenue": 0.0})
+        row["nights"] += counter["nights"]
+        row["revenue"] += counter["revenue"]
+    for row in series.values():
+        row["revenue"] = round(row["revenue"], 2)
+    return list(series.values())
+
+async def compute_counters(db) -> dict:
+    """Recompute every counter from the bookings collection"""
+    room_types = {}
+    async for room in db.rooms.find({}, {"roomType": 1}):
+        room_types[str(room["_id"])] = room["roomType"]
+
+    counters = {}
+    cursor = db.bookings.find(
+        {"status": {"$nin": list(UNCOUNTED_STATUSES)}},
+        {"room_id": 1, "room_type": 1, "check_in_date": 1, "check_out_date": 1, "total_amount": 1}
+    )
+    async for booking in cursor:
+        try:
+            nights = stay_nights(booking)
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not nights:
+            continue
+        room_type = booking.get("room_type") or room_types.get(booking.get("room_id"), "Unknown")
+        nightly_revenue = booking.get("total_amount", 0) / len(nights)
+        for night in nights:
+            counter = counters.setdefault(
+                counter_id(night, room_type),
+                {"day": night, "room_type": room_type, "nights": 0, "revenue": 0.0}
+            )
+            counter["nights"] += 1
+            counter["revenue"] += nightly_revenue
+    return counters
+
+async def diff_counters(db, expected: dict) -> list:
+    """Counters whose stored value differs from `expected`"""
+    live = {}
+    async for counter in db.booking_counters.find():
+        live[counter["_id"]] = counter
+
+    differences = []
+    for key in sorted(set(expected) | set(live)):
+        want = expected.get(key, {"nights": 0, "revenue": 0.0})
+        have = live.get(key, {"nights": 0, "revenue": 0.0})
+        if want["nights"] != have["nights"] or abs(want["revenue"] - have["revenue"]) > 0.01:
+            differences.append({
+                "counter": key,
+                "expected": {"nights": want["nights"], "revenue": round(want["revenue"], 2)},
+                "live": {"nights": have["nights"], "revenue": round(have["revenue"], 2)},
+            })
+    return differences
+
+async def rebuild_counters(db) -> dict:
+    """
+    Replace the counters with values recomputed from the bookings
+
+    Each counter is overwritten in place and stale ones are deleted
+    afterwards, so reports never see an empty collection mid-rebuild.
+
+    Returns:
+        Number of counters written and the differences found beforehand
+    """
+    expected = await compute_counters(db)
+    differences = await diff_counters(db, expected)
+
+    operations = [
+        ReplaceOne({"_id": key}, counter, upsert=True)
+        for key, counter in expected.items()
+    ]
+    for start in range(0, len(operations), BATCH_SIZE):
+        await db.booking_counters.bulk_write(operations[start:start + BATCH_SIZE], ordered=False)
+
+    stale = [counter["_id"] async for counter in db.booking_counters.find({}, {"_id": 1}) if counter["_id"] not in expected]
+    for start in range(0, len(stale), BATCH_SIZE):
+        await db.booking_counters.delete_many({"_id": {"$in": stale[start:start + BATCH_SIZE]}})
+    return {"counters": len(expected), "differences": differences}
+
+async def main(command: str) -> int:
+    from app.config.database import db
+
+    if command == "check":
+        differences = await diff_counters(db, await compute_counters(db))
+    elif command == "rebuild":
+        result = await rebuild_counters(db)
+        print(f"Rebuilt {result['counters']} counters")
+        differences = result["differences"]
+    else:
+        print(__doc__)
+        return 2
+
+    for difference in differences:
+        print(f"❌ {difference['counter']}: expected {difference['expected']}, live {difference['live']}")
+    print(f"{len(differences)} counters differed from the bookings")
+    return 1 if differences and command == "check" else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "")))
@@ -0,0 +1,87 @@
+import hashlib
+
+from fastapi import Request, Response
+
+from app.utils.logger import get_logger
+from app.utils.responses import dumps
+
+logger = get_logger("http_cache")
+
+# Cache-Control policy per read endpoint. Everything is revalidated with
+# the ETag; only the public availability search may be reused briefly.
+CACHE_POLICIES = {
+    "rooms": "public, no-cache",
+    "rooms_available": "public, max-age=10, stale-while-revalidate=30",
+    "bookings": "private, no-cache",
+}
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the response body"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    True if the request's If-None-Match header matches `etag`
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so ignore any W/ prefix
+    candidates = [tag.strip() for tag in header.split(",")]
+    return any(tag[2:] == etag if tag.startswith("W/") else tag == etag for tag in candidates)
+
+def conditional_response(request: Request, body: bytes, policy: str, etag: str = None) -> Response:
+    """
+    JSON response carrying an ETag, or an empty 304 if the client has it
+
+    Args:
+        request: Incoming request
+        body: Serialized JSON body
+        policy: Key into CACHE_POLICIES
+        etag: Precomputed ETag for `body`, computed if omitted
+    """
+    etag = etag or make_etag(body)
+    headers = {"ETag": etag, "Cache-Control": CACHE_POLICIES[policy]}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def conditional_json(request: Request, payload, policy: str) -> Response:
+    """Serialize `payload` and answer it through conditional_response"""
+    return conditional_response(request, dumps(payload), policy)
+
+# Collections whose list endpoints are tagged by a version number rather
+# than by their body. Every write to the collection bumps the version in
+# `cache_versions`, so a matching If-None-Match is answered before the
+# query runs.
+
+async def bump_version(db, name: str):
+    """
+    Invalidate every ETag issued for `name`; call after the write
+
+    A failure is logged rather than raised: the write has happened, and the
+    next bump invalidates the ETags anyway.
+    """
+    try:
+        await db.cache_versions.update_one({"_id": name}, {"$inc": {"version": 1}}, upsert=True)
+    except Exception:
+        logger.exception("Could not bump cache version", extra={"collection": name})
+
+async def versioned_etag(db, request: Request, name: str) -> str:
+    """
+    ETag for this request's URL at the current version of `name`
+
+    Read it before running the query: a write landing in between then only
+    makes the ETag older than the body, never newer.
+    """
+    version = await db.cache_versions.find_one({"_id": name})
+    key = f"{name}:{version['version'] if version else 0}:{request.url.path}?{request.url.query}"
+    return make_etag(key.encode())
+
+def not_modified(request: Request, etag: str, policy: str):
+    """Empty 304 if the client already has `etag`, else None"""
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_POLICIES[policy]})
+    return None
@@ -0,0 +1,292 @@
+"""
+Idempotency-Key support for retried POSTs.
+
+A client that sends `Idempotency-Key: <unique value>` with POST /bookings/
+or POST /rooms/ gets the same response for every retry with that key: the
+first request runs, its 2xx or 4xx response is stored, and retries replay
+it (with `Idempotent-Replayed: true`) without running the route again.
+5xx responses are not stored, so a failed request can be retried.
+
+Responses live in the TTL-indexed `idempotency_keys` collection, shared by
+all workers, with the most recent ones also in an in-process LRU. While
+the first request is running, its key is held by an in-progress document;
+duplicates wait for it to finish (in-process ones on a future, others by
+polling) instead of running concurrently. A key reused with a different
+request body is rejected with 422.
+"""
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo.errors import DuplicateKeyError
+
+from app.config.database import db
+from app.utils.logger import get_logger
+from app.utils.responses import dumps
+
+load_dotenv()
+
+logger = get_logger("idempotency")
+
+# Stored responses are kept for this long
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+# An in-progress key older than this is assumed abandoned and taken over
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+# How long a duplicate waits for the first request before giving up
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 30))
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", 1000))
+# Larger responses are not stored (the request stays retryable)
+MAX_STORED_RESPONSE_BYTES = 1024 * 1024
+MAX_KEY_LENGTH = 255
+
+# (method, path without trailing slash) of the routes that honour the header
+IDEMPOTENT_ROUTES = {("POST", "/bookings"), ("POST", "/rooms")}
+
+KEY_HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status", "headers", "body")
+
+    def __init__(self, fingerprint: str, status: int, headers: list, body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    @classmethod
+    def from_document(cls, doc: dict) -> "StoredResponse":
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in doc["headers"]]
+        return cls(doc["fingerprint"], doc["status"], headers, bytes(doc["body"]))
+
+class ResponseLRU:
+    """Most recently stored responses, by scoped key"""
+
+    def __init__(self, size: int = IDEMPOTENCY_CACHE_SIZE):
+        self.size = size
+        self._items = OrderedDict()
+
+    def get(self, key: str):
+        response = self._items.get(key)
+        if response is not None:
+            self._items.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: StoredResponse):
+        self._items[key] = response
+        self._items.move_to_end(key)
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+recent_responses = ResponseLRU()
+_inflight = {}
+
+def request_fingerprint(scope: dict, body: bytes) -> str:
+    """
+    Hash of the request. Multipart boundaries are random per attempt, so
+    they are removed before hashing.
+    """
+    content_type = b""
+    for name, value in scope["headers"]:
+        if name == b"content-type":
+            content_type = value
+            break
+    if b"multipart/form-data" in content_type and b"boundary=" in content_type:
+        boundary = content_type.split(b"boundary=", 1)[1].split(b";", 1)[0].strip(b'"')
+        body = body.replace(boundary, b"")
+        content_type = b"multipart/form-data"
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), content_type, body):
+        digest.update(part)
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+async def send_stored(send, response: StoredResponse):
+    await send({
+        "type": "http.response.start",
+        "status": response.status,
+        "headers": response.headers + [REPLAYED_HEADER],
+    })
+    await send({"type": "http.response.body", "body": response.body})
+
+async def send_error(send, status: int, detail: str):
+    body = dumps({"detail": detail})
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+async def claim_key(key: str, fingerprint: str):
+    """
+    Take the key for this request
+
+    Returns:
+        None if this request now holds the key, or the existing document
+    """
+    now = datetime.utcnow()
+    try:
+        await db.idempotency_keys.insert_one({
+            "_id": key,
+            "state": "in_progress",
+            "fingerprint": fingerprint,
+            "created_at": now,
+            "locked_at": now,
+        })
+        return None
+    except DuplicateKeyError:
+        pass
+
+    existing = await db.idempotency_keys.find_one({"_id": key})
+    if existing is None:
+        # Expired between the insert and the read; try once more
+        return await claim_key(key, fingerprint)
+    if existing["state"] == "in_progress" and existing["locked_at"] < now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS):
+        taken = await db.idempotency_keys.find_one_and_update(
+            {"_id": key, "state": "in_progress", "locked_at": existing["locked_at"]},
+            {"$set": {"fingerprint": fingerprint, "locked_at": now}}
+        )
+        if taken is not None:
+            logger.warning("Took over abandoned idempotency key", extra={"key": key})
+            return None
+    return existing
+
+async def wait_for_completion(key: str, existing: dict):
+    """
+    Poll until another worker finishes the request holding the key
+
+    Returns:
+        The completed document, or None if the key was released after a
+        failure
+
+    Raises:
+        asyncio.TimeoutError: if it is still running after IDEMPOTENCY_WAIT_SECONDS
+    """
+    deadline = time.monotonic() + IDEMPOTENCY_WAIT_SECONDS
+    delay = 0.05
+    while existing is not None and existing["state"] == "in_progress":
+        if time.monotonic() >= deadline:
+            raise asyncio.TimeoutError()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 0.5)
+        existing = await db.idempotency_keys.find_one({"_id": key})
+    return existing
+
+class IdempotencyMiddleware:
+    """ASGI middleware implementing Idempotency-Key for IDEMPOTENT_ROUTES"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"].rstrip("/")) not in IDEMPOTENT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+        raw_key = None
+        for name, value in scope["headers"]:
+            if name == KEY_HEADER:
+                raw_key = value.decode("latin-1").strip()
+                break
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            await send_error(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        # Buffer the body: it is hashed, then handed to the route unchanged
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        body = b"".join(chunks)
+        fingerprint = request_fingerprint(scope, body)
+        key = f"{scope['method']} {scope['path'].rstrip('/')} {raw_key}"
+
+        while True:
+            # Another request in this process holds the key: wait for it
+            while key in _inflight:
+                await asyncio.shield(_inflight[key])
+
+            stored = recent_responses.get(key)
+            if stored is not None:
+                break
+            existing = await claim_key(key, fingerprint)
+            if existing is None:
+                await self._run_first(key, fingerprint, body, scope, receive, send)
+                return
+            if existing["fingerprint"] != fingerprint:
+                await send_error(send, 422, "Idempotency-Key was already used with a different request")
+                return
+            try:
+                existing = await wait_for_completion(key, existing)
+            except asyncio.TimeoutError:
+                await send_error(send, 409, "A request with this Idempotency-Key is still in progress")
+                return
+            if existing is not None:
+                stored = StoredResponse.from_document(existing)
+                recent_responses.put(key, stored)
+                break
+            # The first request failed and released the key: run this one
+
+        if stored.fingerprint != fingerprint:
+            await send_error(send, 422, "Idempotency-Key was already used with a different request")
+            return
+        await send_stored(send, stored)
+
+    async def _run_first(self, key: str, fingerprint: str, body: bytes, scope, receive, send):
+        done = _inflight[key] = asyncio.get_running_loop().create_future()
+        response = {"status": 500, "headers": [], "body": []}
+        size = 0
+        body_sent = False
+
+        async def replay_body():
+            nonlocal body_sent
+            if body_sent:
+                # Only a disconnect can follow the body
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message):
+            nonlocal size
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if size <= MAX_STORED_RESPONSE_BYTES:
+                    response["body"].append(message.get("body", b""))
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, replay_body, capture)
+            if response["status"] < 500 and size <= MAX_STORED_RESPONSE_BYTES:
+                result = StoredResponse(fingerprint, response["status"], response["headers"], b"".join(response["body"]))
+                await db.idempotency_keys.update_one({"_id": key}, {"$set": {
+                    "state": "done",
+                    "status": result.status,
+                    "headers": [[name.decode("latin-1"), value.decode("latin-1")] for name, value in result.headers],
+                    "body": result.body,
+                }})
+                recent_responses.put(key, result)
+                stored = True
+        finally:
+            if not stored:
+                # Let a retry run the request again
+                try:
+                    await db.idempotency_keys.delete_one({"_id": key, "state": "in_progress"})
+                except Exception:
+                    logger.exception("Could not release idempotency key", extra={"key": key})
+            del _inflight[key]
+            done.set_result(None)
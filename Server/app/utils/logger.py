@@ -0,0 +1,215 @@
+"""
+Structured application logging.
+
+Records are written as one JSON object per line and carry the ID of the
+request that produced them. Handlers only put records on a bounded queue;
+a background thread formats and writes them, so a slow stdout never
+blocks the event loop. When the queue is full, records are dropped and
+counted instead.
+
+High-volume success logs pass `extra=sampled(...)` and are kept at
+LOG_SAMPLE_RATE. Warnings and errors are always kept.
+
+    logger = get_logger("bookings")
+    logger.info("Booking created", extra=sampled(booking_id=booking_id))
+    logger.exception("Error in create_booking")
+"""
+import atexit
+import copy
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from dotenv import load_dotenv
+
+from app.utils.metrics import registry
+from app.utils.responses import dumps
+
+load_dotenv()
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for one object per line, "text" for local development
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# Fraction of sampled (success path) records that are kept
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", 0.1))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+ROOT_LOGGER = "luxstay"
+REQUEST_ID_HEADER = "x-request-id"
+# Accept caller-supplied request IDs only if they are short and printable
+_REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9._:-]{1,64}$")
+
+request_id_var: ContextVar = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+_INTERNAL_ATTRIBUTES = {"request_id", "sampled"}
+
+_stats = {"dropped": 0}
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+def sampled(**fields) -> dict:
+    """`extra` for a high-volume success record, kept at LOG_SAMPLE_RATE"""
+    return {"sampled": True, **fields}
+
+class RequestContextFilter(logging.Filter):
+    """Attach the current request ID; runs on the logging thread's caller"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keep `sampled` records below WARNING with probability `rate`"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not getattr(record, "sampled", False):
+            return True
+        return self.rate >= 1.0 or random.random() < self.rate
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in _INTERNAL_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return dumps(entry).decode()
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        return super().format(record)
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records instead of waiting when the queue is full"""
+
+    def prepare(self, record):
+        # Resolve the message and traceback here, while the arguments and
+        # exception are still alive, but leave the rest to the formatter
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _stats["dropped"] += 1
+
+_listener = None
+
+def configure_logging():
+    """Route the application's loggers through the queue (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.addFilter(SamplingFilter(LOG_SAMPLE_RATE))
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(handler)
+    root.propagate = False
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+def new_request_id(supplied: str = None) -> str:
+    if supplied and _REQUEST_ID_PATTERN.match(supplied):
+        return supplied
+    return uuid.uuid4().hex
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving every request an ID: the caller's X-Request-ID
+    if it is valid, a new one otherwise. The ID is returned in the
+    X-Request-ID response header and attached to every log record.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = get_logger("http")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        supplied = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                supplied = value.decode("latin-1")
+                break
+        request_id = new_request_id(supplied)
+        token = request_id_var.set(request_id)
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.encode(), request_id.encode())
+                ]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            fields = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            if status >= 500:
+                self.logger.error("Request failed", extra=fields)
+            else:
+                self.logger.info("Request completed", extra=sampled(**fields))
+            request_id_var.reset(token)
+
+def _collect_metrics() -> list:
+    return [
+        ("log_records_dropped_total", "counter", "Log records dropped because the log queue was full", _stats["dropped"]),
+    ]
+
+registry.add_collector(_collect_metrics)
@@ -0,0 +1,261 @@
+"""
+In-process metrics rendered in the Prometheus text format at /metrics.
+
+Counters, gauges and histograms are updated where the work happens: the
+HTTP middleware below, the MongoDB command listener registered on the
+client, the upload pool and the bcrypt pool. Values that already live in
+other objects (cache and scheduler stats) are read at scrape time by
+collectors. Each worker process exposes its own values.
+"""
+import logging
+import threading
+import time
+
+from pymongo import monitoring
+
+# Seconds; covers fast cached reads up to slow uploads
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    """Monotonic count per label set"""
+    kind = "counter"
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            values = list(self._values.items())
+        lines = self._header()
+        for label_values, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}")
+        return lines
+
+class Gauge(Counter):
+    """Value that goes up and down, per label set"""
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def set(self, value: float, *label_values):
+        with self._lock:
+            self._values[label_values] = value
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                # One slot per bucket plus +Inf, then the sum
+                series = self._values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        with self._lock:
+            values = [(labels, list(series)) for labels, series in self._values.items()]
+        lines = self._header()
+        bounds = self.buckets + (float("inf"),)
+        for label_values, series in values:
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(round(series[-1], 6))}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """Named metrics plus collectors that produce values at scrape time"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name: str, help_text: str, labels: tuple = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collect):
+        """
+        Register a callable returning (name, kind, help, value) tuples, read
+        on every scrape
+        """
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                samples = collect()
+            except Exception:
+                logging.getLogger("luxstay.metrics").exception("Error in metrics collector")
+                continue
+            for name, kind, help_text, value in samples:
+                if value is None:
+                    continue
+                lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {_format_value(value)}"])
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+http_latency = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests being handled, by API area", ("area",)
+)
+mongo_latency = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command"), MONGO_BUCKETS
+)
+mongo_failures = registry.counter(
+    "mongo_command_failures_total", "Failed MongoDB commands by collection and command", ("collection", "command")
+)
+upload_latency = registry.histogram(
+    "image_upload_duration_seconds", "Image upload time on the upload pool, by outcome", ("outcome",)
+)
+password_latency = registry.histogram(
+    "password_operation_duration_seconds", "bcrypt hash/verify time including queueing", ("operation",)
+)
+
+# Areas for the in-flight gauge; other paths are grouped under "other"
+API_AREAS = ("auth", "rooms", "bookings", "admin")
+
+def route_label(scope: dict) -> str:
+    """Route template of a handled request, so path ids don't explode cardinality"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+class MetricsMiddleware:
+    """ASGI middleware recording count, latency and in-flight per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        area = scope["path"].strip("/").split("/", 1)[0]
+        area = area if area in API_AREAS else "other"
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc(area)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec(area)
+            route = route_label(scope)
+            http_requests.inc(scope["method"], route, str(status))
+            http_latency.observe(elapsed, scope["method"], route)
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    PyMongo command listener feeding mongo_command_duration_seconds.
+
+    Callbacks run on the driver's threads; the collection is only on the
+    started event, so it is remembered until the reply arrives.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    @staticmethod
+    def _key(event):
+        return (event.request_id, event.connection_id)
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        collection = target if isinstance(target, str) else ""
+        with self._lock:
+            self._pending[self._key(event)] = collection
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._pending.pop(self._key(event), "")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        mongo_latency.observe(event.duration_micros / 1_000_000, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_latency.observe(event.duration_micros / 1_000_000, collection, event.command_name)
+        mongo_failures.inc(collection, event.command_name)
+
+mongo_command_metrics = MongoCommandMetrics()
@@ -0,0 +1,52 @@
+import base64
+import json
+from bson import ObjectId
+from fastapi import HTTPException
+
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(sort_value, object_id) -> str:
+    """
+    Build an opaque keyset cursor from the last document of a page
+
+    Args:
+        sort_value: Value of the primary sort field (e.g. created_at)
+        object_id: _id of the document, used as the tie-breaker
+    """
+    raw = json.dumps([sort_value, str(object_id)], default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        Tuple of (sort_value, ObjectId)
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, object_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return sort_value, ObjectId(object_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(field: str, cursor: str) -> dict:
+    """
+    Mongo filter selecting documents after the cursor for a descending
+    (field, _id) sort
+    """
+    sort_value, object_id = decode_cursor(cursor)
+    return {
+        "$or": [
+            {field: {"$lt": sort_value}},
+            {field: sort_value, "_id": {"$lt": object_id}},
+        ]
+    }
+
+def id_cursor_filter(cursor: str) -> dict:
+    """
+    Mongo filter selecting documents after the cursor for a descending _id
+    sort; the cursor is built with encode_cursor(None, last_id)
+    """
+    _, object_id = decode_cursor(cursor)
+    return {"_id": {"$lt": object_id}}
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from passlib.context import CryptContext
+
+from app.utils.metrics import password_latency, registry
+
+load_dotenv()
+
+# bcrypt releases the GIL while hashing, so a thread pool gives real
+# parallelism without blocking the event loop.
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", 2))
+# Password operations allowed to wait for a worker before new ones are refused
+BCRYPT_MAX_QUEUE = int(os.getenv("BCRYPT_MAX_QUEUE", 64))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+_executor = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_stats = {"in_flight": 0, "completed": 0, "rejected": 0}
+
+class PasswordPoolBusy(Exception):
+    """Raised when too many password operations are already queued"""
+
+async def _run(operation: str, fn, *args):
+    if _stats["in_flight"] >= BCRYPT_WORKERS + BCRYPT_MAX_QUEUE:
+        _stats["rejected"] += 1
+        raise PasswordPoolBusy()
+
+    _stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+    finally:
+        _stats["in_flight"] -= 1
+        _stats["completed"] += 1
+        password_latency.observe(time.perf_counter() - started, operation)
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password on the bcrypt pool
+
+    Raises:
+        PasswordPoolBusy: if the pool queue is full
+    """
+    return await _run("hash", pwd_context.hash, password)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    """
+    Verify a password against its hash on the bcrypt pool
+
+    Raises:
+        PasswordPoolBusy: if the pool queue is full
+    """
+    return await _run("verify", pwd_context.verify, password, hashed)
+
+def queue_depth() -> int:
+    """Password operations waiting for a free worker"""
+    return max(0, _stats["in_flight"] - BCRYPT_WORKERS)
+
+def pool_stats() -> dict:
+    return {
+        "workers": BCRYPT_WORKERS,
+        "max_queue": BCRYPT_MAX_QUEUE,
+        "in_flight": _stats["in_flight"],
+        "queue_depth": queue_depth(),
+        "completed": _stats["completed"],
+        "rejected": _stats["rejected"],
+    }
+
+def _collect_metrics() -> list:
+    return [
+        ("bcrypt_pool_in_flight", "gauge", "Password operations running or queued", _stats["in_flight"]),
+        ("bcrypt_pool_queue_depth", "gauge", "Password operations waiting for a worker", queue_depth()),
+        ("bcrypt_pool_rejected_total", "counter", "Password operations refused with 503", _stats["rejected"]),
+    ]
+
+registry.add_collector(_collect_metrics)
@@ -0,0 +1,236 @@
+"""
+On-demand request profiling.
+
+When PROFILING_ENABLED is set, ProfilingMiddleware profiles requests that
+send an `X-Profile` header (matching PROFILE_TOKEN if one is configured),
+plus a random PROFILE_SAMPLE_RATE fraction of all requests. When it is not
+set, neither the middleware nor the MongoDB listener is installed.
+
+A profile combines:
+
+- a sampling profile: a background thread reads the event loop thread's
+  stack every PROFILE_INTERVAL_MS and keeps the samples taken while this
+  request's code was running, as collapsed stacks (flamegraph.pl and
+  speedscope read them directly)
+- MongoDB wall time: Motor runs PyMongo on its executor with a copy of the
+  request's context, so the command listener knows which profile a command
+  belongs to
+
+Python time is estimated from the samples, each weighted by the time since
+the previous one (the sampler can be held back by the GIL). The rest of the wall
+time was spent waiting, on MongoDB or behind other requests on the loop.
+The last PROFILE_KEEP profiles are kept in memory for the admin endpoints.
+"""
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+
+from dotenv import load_dotenv
+from pymongo import monitoring
+
+load_dotenv()
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0.0))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", 2))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", 50))
+# Requests profiled at the same time; more are served unprofiled
+PROFILE_MAX_ACTIVE = int(os.getenv("PROFILE_MAX_ACTIVE", 4))
+
+PROFILE_HEADER = b"x-profile"
+
+current_profile: ContextVar = ContextVar("current_profile", default=None)
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/")
+    parts = path.split("/")
+    return f"{'/'.join(parts[-2:])}:{code.co_name}"
+
+class RequestProfile:
+    """Samples and MongoDB timings of one request"""
+
+    def __init__(self, scope: dict, anchor, thread_id: int):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.started_at = datetime.now().isoformat(timespec="milliseconds")
+        self.anchor = anchor
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self.python_seconds = 0.0
+        self.mongo_seconds = 0.0
+        self.mongo_commands = 0
+        self.status = None
+        self.route = None
+        self.wall_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add_sample(self, leaf, weight: float) -> bool:
+        """Record the stack above the anchor frame; False if the request isn't on it"""
+        labels = []
+        frame = leaf
+        while frame is not None and frame is not self.anchor:
+            labels.append(frame_label(frame))
+            frame = frame.f_back
+        if frame is None:
+            return False
+        labels.append(frame_label(frame))
+        labels.reverse()
+        with self._lock:
+            self.stacks[";".join(labels)] += 1
+            self.samples += 1
+            self.python_seconds += weight
+        return True
+
+    def add_mongo(self, seconds: float):
+        with self._lock:
+            self.mongo_seconds += seconds
+            self.mongo_commands += 1
+
+    def summary(self) -> dict:
+        wall_ms = self.wall_seconds * 1000
+        cpu_ms = self.python_seconds * 1000
+        mongo_ms = self.mongo_seconds * 1000
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "started_at": self.started_at,
+            "wall_ms": round(wall_ms, 2),
+            "python_cpu_ms": round(cpu_ms, 2),
+            "mongo_ms": round(mongo_ms, 2),
+            "mongo_commands": self.mongo_commands,
+            # Concurrent commands overlap, so this can be negative
+            "other_wait_ms": round(wall_ms - cpu_ms - mongo_ms, 2),
+            "samples": self.samples,
+            "interval_ms": PROFILE_INTERVAL_MS,
+        }
+
+    def collapsed(self) -> str:
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+class Profiler:
+    """Sampler thread shared by the active profiles, plus the recent ones"""
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS, keep: int = PROFILE_KEEP):
+        self.interval = interval_ms / 1000
+        self._active = []
+        self._recent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, profile: RequestProfile) -> bool:
+        with self._lock:
+            if len(self._active) >= PROFILE_MAX_ACTIVE:
+                return False
+            self._active.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._thread.start()
+        return True
+
+    def finish(self, profile: RequestProfile):
+        with self._lock:
+            self._active.remove(profile)
+            self._recent.append(profile)
+        profile.anchor = None
+
+    def _sample_loop(self):
+        last = time.perf_counter()
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            weight, last = now - last, now
+            with self._lock:
+                active = list(self._active)
+                if not active:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in active:
+                leaf = frames.get(profile.thread_id)
+                if leaf is not None and profile.anchor is not None:
+                    profile.add_sample(leaf, weight)
+
+    def recent(self) -> list:
+        with self._lock:
+            return [profile.summary() for profile in reversed(self._recent)]
+
+    def get(self, profile_id: str):
+        with self._lock:
+            for profile in self._recent:
+                if profile.id == profile_id:
+                    return profile
+        return None
+
+profiler = Profiler()
+
+def should_profile(scope: dict) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return PROFILE_TOKEN is None or value.decode("latin-1") == PROFILE_TOKEN
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+class ProfilingMiddleware:
+    """ASGI middleware profiling selected requests; adds X-Profile-Id to them"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # This coroutine's frame is on the loop thread's stack exactly when
+        # the request's own code is running
+        profile = RequestProfile(scope, sys._getframe(), threading.get_ident())
+        if not profiler.start(profile):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profile.wall_seconds = time.perf_counter() - started
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None)
+            current_profile.reset(token)
+            profiler.finish(profile)
+
+class MongoProfileListener(monitoring.CommandListener):
+    """Adds each command's duration to the profile of the request that sent it"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        profile = current_profile.get()
+        if profile is not None:
+            profile.add_mongo(event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        self.succeeded(event)
+
+mongo_profile_listener = MongoProfileListener()
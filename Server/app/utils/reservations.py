@@ -0,0 +1,107 @@
+"""
+Room-night claims: the authority on which room is booked for which night.
+
+Every active booking owns one `room_nights` document per night of its stay,
+keyed by "<room_id>:<YYYY-MM-DD>". The unique _id makes a reservation a
+single conditional write: of two concurrent bookings for the same night,
+exactly one insert succeeds.
+
+Claims for existing bookings are created with:
+
+    python -m app.utils.reservations backfill
+"""
+import asyncio
+import sys
+from datetime import date, timedelta
+
+from pymongo.errors import BulkWriteError
+
+from app.utils.availability import ACTIVE_STATUSES
+
+def night_keys(room_id: str, check_in: str, check_out: str) -> list:
+    """Claim documents for each night in [check_in, check_out)"""
+    night = date.fromisoformat(check_in)
+    last = date.fromisoformat(check_out)
+    docs = []
+    while night < last:
+        docs.append({"_id": f"{room_id}:{night.isoformat()}", "room_id": room_id, "night": night.isoformat()})
+        night += timedelta(days=1)
+    return docs
+
+async def claim_nights(db, room_id: str, check_in: str, check_out: str, booking_id) -> bool:
+    """
+    Atomically claim every night of a stay for a booking
+
+    Returns:
+        True if all nights were claimed, False if any was already taken (in
+        which case the nights this call claimed are released again; claims
+        made by other calls are left alone)
+    """
+    docs = night_keys(room_id, check_in, check_out)
+    for doc in docs:
+        doc["booking_id"] = str(booking_id)
+    try:
+        await db.room_nights.insert_many(docs, ordered=True)
+        return True
+    except BulkWriteError as e:
+        # Ordered inserts stop at the first taken night: only the nights
+        # before it were inserted by this call
+        inserted = [doc["_id"] for doc in docs[:e.details.get("nInserted", 0)]]
+        if inserted:
+            await db.room_nights.delete_many({"_id": {"$in": inserted}, "booking_id": str(booking_id)})
+        return False
+
+async def unclaim_nights(db, room_id: str, check_in: str, check_out: str, booking_id):
+    """Release the nights of one stay, if this booking holds them"""
+    night_ids = [doc["_id"] for doc in night_keys(room_id, check_in, check_out)]
+    if night_ids:
+        await db.room_nights.delete_many({"_id": {"$in": night_ids}, "booking_id": str(booking_id)})
+
+async def release_nights(db, booking_id):
+    """Release every night claimed by a booking"""
+    await db.room_nights.delete_many({"booking_id": str(booking_id)})
+
+async def release_room(db, room_id: str):
+    """Release every night claimed for a room (the _id prefix uses the _id index)"""
+    await db.room_nights.delete_many({"_id": {"$regex": f"^{room_id}:"}})
+
+async def backfill_claims(db) -> dict:
+    """
+    Create missing claims for active bookings; existing claims are kept
+
+    Returns:
+        Counts of bookings scanned, claims inserted and nights already claimed
+    """
+    stats = {"bookings": 0, "claimed": 0, "already_claimed": 0}
+    cursor = db.bookings.find(
+        {"status": {"$in": list(ACTIVE_STATUSES)}},
+        {"room_id": 1, "check_in_date": 1, "check_out_date": 1}
+    )
+    async for booking in cursor:
+        stats["bookings"] += 1
+        try:
+            docs = night_keys(booking["room_id"], booking["check_in_date"], booking["check_out_date"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if not docs:
+            continue
+        for doc in docs:
+            doc["booking_id"] = str(booking["_id"])
+        try:
+            result = await db.room_nights.insert_many(docs, ordered=False)
+            stats["claimed"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            stats["claimed"] += e.details.get("nInserted", 0)
+            stats["already_claimed"] += len(e.details.get("writeErrors", []))
+    return stats
+
+async def main(command: str):
+    from app.config.database import db
+
+    if command == "backfill":
+        print(await backfill_claims(db))
+    else:
+        print(__doc__)
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else ""))
@@ -0,0 +1,41 @@
+import json
+from datetime import date, datetime
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+# orjson is optional: it is several times faster than the standard library,
+# but everything works without it.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload) -> bytes:
+    """
+    Serialize already-plain data (dicts, lists, strings, numbers) to JSON
+
+    ObjectId and datetime values are converted; anything else has to be
+    converted by the caller, as the serializers in the routes already do.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with `dumps`.
+
+    Returning it directly from a route also skips FastAPI's jsonable_encoder
+    pass, which dominates the cost of large lists.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,274 @@
+"""
+Background maintenance of bookings and room statuses.
+
+Every worker runs the loop, but a run only happens while the worker holds
+the lease document in `scheduler_leases`, so one worker does the work at a
+time and another takes over if it dies. Each run:
+
+- cancels Pending bookings older than PENDING_HOLD_MINUTES and releases
+  their room-night claims and counters
+- sets every room to the status its bookings imply for today: "Occupied"
+  while an active booking covers tonight, "Available" otherwise. Future
+  stays do not change the status, so a room booked for next month still
+  shows up as available tonight; date searches go by the claims instead
+"""
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.utils.availability import ACTIVE_STATUSES, availability
+from app.utils.cache import room_catalog
+from app.utils.counters import booking_delta_ops, is_counted
+from app.utils.http_cache import bump_version
+from app.utils.logger import get_logger
+from app.utils.metrics import registry
+
+logger = get_logger("scheduler")
+
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULER_INTERVAL_SECONDS = int(os.getenv("SCHEDULER_INTERVAL_SECONDS", 60))
+# How long a Pending booking holds its room before it is cancelled: a day
+# by default, which leaves admins time to confirm it; 0 keeps Pending
+# bookings until an admin confirms or cancels them
+PENDING_HOLD_MINUTES = int(os.getenv("PENDING_HOLD_MINUTES", 24 * 60))
+# A lease outlives one missed run, then any worker may take it over
+LEASE_SECONDS = int(os.getenv("SCHEDULER_LEASE_SECONDS", SCHEDULER_INTERVAL_SECONDS * 3))
+
+LEASE_ID = "booking_scheduler"
+# Room statuses the scheduler manages; anything else (Maintenance) is left alone
+MANAGED_ROOM_STATUSES = ("Available", "Reserved", "Occupied")
+
+async def acquire_lease(db, owner: str, now: datetime, lease_seconds: int = LEASE_SECONDS) -> bool:
+    """
+    Take or renew the scheduler lease
+
+    Returns:
+        True if `owner` holds the lease until now + lease_seconds
+    """
+    try:
+        lease = await db.scheduler_leases.find_one_and_update(
+            {"_id": LEASE_ID, "$or": [{"owner": owner}, {"expires_at": {"$lt": now}}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=lease_seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Another worker holds a live lease, so the upsert collided with it
+        return False
+    return lease is not None and lease["owner"] == owner
+
+async def release_lease(db, owner: str):
+    """Give the lease up so another worker can take over immediately"""
+    await db.scheduler_leases.delete_one({"_id": LEASE_ID, "owner": owner})
+
+async def expire_pending_bookings(db, hold_minutes: int) -> list:
+    """
+    Cancel Pending bookings created more than `hold_minutes` ago
+
+    Returns:
+        The cancelled bookings
+    """
+    # created_at is a local ISO timestamp, which orders correctly as a string
+    cutoff = (datetime.now() - timedelta(minutes=hold_minutes)).isoformat()
+    stale = await db.bookings.find(
+        {"status": "Pending", "created_at": {"$lt": cutoff}},
+        {"room_id": 1, "room_type": 1, "check_in_date": 1, "check_out_date": 1, "total_amount": 1, "status": 1}
+    ).to_list(length=None)
+    if not stale:
+        return []
+
+    # The status condition skips bookings confirmed since they were read;
+    # the run marker tells which updates actually applied
+    marker = ObjectId()
+    await db.bookings.bulk_write([
+        UpdateOne(
+            {"_id": booking["_id"], "status": "Pending"},
+            {"$set": {
+                "status": "Cancelled",
+                "cancel_reason": "Expired",
+                "expired_by": marker,
+                "updated_at": datetime.now().isoformat()
+            }}
+        )
+        for booking in stale
+    ], ordered=False)
+    expired_ids = {
+        doc["_id"] async for doc in db.bookings.find(
+            {"_id": {"$in": [booking["_id"] for booking in stale]}, "expired_by": marker}, {"_id": 1}
+        )
+    }
+    await db.bookings.update_many({"_id": {"$in": list(expired_ids)}}, {"$unset": {"expired_by": ""}})
+    expired = [booking for booking in stale if booking["_id"] in expired_ids]
+    if not expired:
+        return []
+    await bump_version(db, "bookings")
+
+    await db.room_nights.delete_many({"booking_id": {"$in": [str(booking["_id"]) for booking in expired]}})
+
+    room_types = {}
+    room_ids = [ObjectId(b["room_id"]) for b in expired if not b.get("room_type") and ObjectId.is_valid(b.get("room_id", ""))]
+    if room_ids:
+        async for room in db.rooms.find({"_id": {"$in": room_ids}}, {"roomType": 1}):
+            room_types[str(room["_id"])] = room["roomType"]
+    counter_ops = []
+    for booking in expired:
+        if is_counted(booking["status"]):
+            room_type = booking.get("room_type") or room_types.get(booking.get("room_id"), "Unknown")
+            counter_ops.extend(booking_delta_ops(booking, -1, room_type))
+    if counter_ops:
+        await db.booking_counters.bulk_write(counter_ops, ordered=False)
+
+    # Only this worker's index learns of the expiry; the others catch up on
+    # their next reload. Bookings are decided by the claims released above,
+    # so until then the lag only hides these rooms from room searches.
+    for booking in expired:
+        availability.remove_booking(str(booking["_id"]))
+    return expired
+
+def room_status_for(bookings: list, today: str) -> str:
+    """Status a room should have today given its active bookings"""
+    for booking in bookings:
+        if booking["check_in_date"] <= today < booking["check_out_date"]:
+            return "Occupied"
+    return "Available"
+
+async def roll_room_statuses(db, today: str = None) -> int:
+    """
+    Bring every managed room's status in line with its bookings
+
+    Returns:
+        Number of rooms whose status changed
+    """
+    today = today or date.today().isoformat()
+    bookings_by_room = {}
+    cursor = db.bookings.find(
+        {"status": {"$in": list(ACTIVE_STATUSES)}, "check_out_date": {"$gt": today}},
+        {"room_id": 1, "status": 1, "check_in_date": 1, "check_out_date": 1}
+    )
+    async for booking in cursor:
+        bookings_by_room.setdefault(booking["room_id"], []).append(booking)
+
+    operations = []
+    async for room in db.rooms.find({"status": {"$in": list(MANAGED_ROOM_STATUSES)}}, {"status": 1}):
+        wanted = room_status_for(bookings_by_room.get(str(room["_id"]), []), today)
+        if wanted != room["status"]:
+            # Match the old status so a concurrent admin change wins
+            operations.append(UpdateOne(
+                {"_id": room["_id"], "status": room["status"]},
+                {"$set": {"status": wanted}}
+            ))
+    if not operations:
+        return 0
+
+    result = await db.rooms.bulk_write(operations, ordered=False)
+    if result.modified_count:
+        room_catalog.invalidate()
+    return result.modified_count
+
+class BookingScheduler:
+    """Periodic expiry and room rollover, run by whichever worker holds the lease"""
+
+    def __init__(self, interval: int = SCHEDULER_INTERVAL_SECONDS, hold_minutes: Optional[int] = PENDING_HOLD_MINUTES):
+        self.interval = interval
+        self.hold_minutes = hold_minutes
+        self._last_run = None
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stats = {
+            "runs": 0,
+            "skipped_no_lease": 0,
+            "errors": 0,
+            "expired_bookings": 0,
+            "rooms_updated": 0,
+            "last_run_at": None,
+            "last_duration_ms": None,
+            "last_lag_ms": None,
+            "max_lag_ms": 0.0,
+            "last_error": None,
+            "is_leader": False,
+        }
+
+    async def run_once(self, db) -> dict:
+        """One pass, if this worker holds the lease"""
+        if not await acquire_lease(db, self.owner, datetime.now(timezone.utc)):
+            self._stats["is_leader"] = False
+            self._stats["skipped_no_lease"] += 1
+            return {"ran": False}
+
+        self._stats["is_leader"] = True
+        started = time.perf_counter()
+        expired = await expire_pending_bookings(db, self.hold_minutes) if self.hold_minutes else []
+        if expired:
+            room_catalog.invalidate()
+        rooms_updated = await roll_room_statuses(db)
+
+        self._stats["runs"] += 1
+        self._stats["expired_bookings"] += len(expired)
+        self._stats["rooms_updated"] += rooms_updated
+        self._stats["last_run_at"] = datetime.now().isoformat()
+        self._last_run = time.monotonic()
+        self._stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return {"ran": True, "expired": len(expired), "rooms_updated": rooms_updated}
+
+    async def run_forever(self, db):
+        """Run every `interval` seconds until cancelled"""
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        try:
+            while True:
+                # Lag: how late this run starts compared with its schedule
+                lag_ms = max(loop.time() - due, 0.0) * 1000
+                self._stats["last_lag_ms"] = round(lag_ms, 2)
+                self._stats["max_lag_ms"] = round(max(self._stats["max_lag_ms"], lag_ms), 2)
+                try:
+                    await self.run_once(db)
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    self._stats["last_error"] = str(e)
+                    logger.exception("Error in scheduler run")
+                # Skip runs missed while this one was late rather than bunching them
+                due = max(due + self.interval, loop.time())
+                await asyncio.sleep(max(due - loop.time(), 0))
+        finally:
+            if self._stats["is_leader"]:
+                try:
+                    await release_lease(db, self.owner)
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": SCHEDULER_ENABLED,
+            "owner": self.owner,
+            "interval_seconds": self.interval,
+            "hold_minutes": self.hold_minutes,
+            **self._stats,
+        }
+
+    def metrics(self) -> list:
+        """Samples for the metrics registry"""
+        stats = self._stats
+        since_last_run = time.monotonic() - self._last_run if self._last_run is not None else None
+        last_duration = stats["last_duration_ms"] / 1000 if stats["last_duration_ms"] is not None else None
+        last_lag = stats["last_lag_ms"] / 1000 if stats["last_lag_ms"] is not None else None
+        return [
+            ("scheduler_runs_total", "counter", "Scheduler runs completed by this worker", stats["runs"]),
+            ("scheduler_skipped_total", "counter", "Scheduler ticks skipped because another worker holds the lease", stats["skipped_no_lease"]),
+            ("scheduler_errors_total", "counter", "Scheduler runs that failed", stats["errors"]),
+            ("scheduler_expired_bookings_total", "counter", "Pending bookings cancelled after the hold window", stats["expired_bookings"]),
+            ("scheduler_rooms_updated_total", "counter", "Room statuses changed by the scheduler", stats["rooms_updated"]),
+            ("scheduler_is_leader", "gauge", "1 if this worker held the lease on its last tick", int(stats["is_leader"])),
+            ("scheduler_last_duration_seconds", "gauge", "Duration of the last run", last_duration),
+            ("scheduler_lag_seconds", "gauge", "How late the last tick started", last_lag),
+            ("scheduler_seconds_since_last_run", "gauge", "Time since this worker last completed a run", since_last_run),
+        ]
+
+booking_scheduler = BookingScheduler()
+registry.add_collector(booking_scheduler.metrics)
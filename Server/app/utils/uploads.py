@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary
+import cloudinary.uploader
+from dotenv import load_dotenv
+
+from app.utils.metrics import upload_latency
+
+load_dotenv()
+
+# Load Cloudinary config from .env
+cloudinary.config(
+    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+    api_key=os.getenv("CLOUDINARY_API_KEY"),
+    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+    secure=True
+)
+
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", 8))
+# Passed to the HTTP client, so a stuck upload fails and frees its thread
+UPLOAD_TIMEOUT_SECONDS = float(os.getenv("UPLOAD_TIMEOUT_SECONDS", 30))
+# The request stops waiting after this many timeouts. The client timeout
+# bounds each connect and read, not the whole upload, and time spent
+# queued for a pool thread counts here too
+UPLOAD_BACKSTOP_FACTOR = 2
+
+# Uploads block on the network, so they run here instead of on the event loop.
+# The pool size bounds the number of uploads in flight across all requests.
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="upload")
+
+def cloudinary_uploader(file, timeout: float = UPLOAD_TIMEOUT_SECONDS) -> str:
+    """
+    Upload a file object to Cloudinary (blocking)
+
+    Args:
+        file: File object to upload
+        timeout: HTTP timeout in seconds
+
+    Returns:
+        The secure URL of the uploaded image
+    """
+    result = cloudinary.uploader.upload(file, timeout=timeout)
+    return result.get("secure_url")
+
+class StubUploader:
+    """
+    Local stand-in for Cloudinary: no network, deterministic URLs.
+
+    Enable it with UPLOADER=stub, or call set_uploader(StubUploader()).
+
+    Args:
+        delay: Seconds to sleep per upload, to simulate network latency
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self, file, timeout: float = None) -> str:
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        digest = hashlib.sha1(file.read()).hexdigest()
+        return f"https://stub.local/images/{digest}.jpg"
+
+_uploader = StubUploader() if os.getenv("UPLOADER") == "stub" else cloudinary_uploader
+
+def set_uploader(uploader):
+    """
+    Replace the blocking upload function (a callable taking a file object
+    and a timeout in seconds, and returning a URL)
+    """
+    global _uploader
+    _uploader = uploader
+
+async def upload_images(files, timeout: float = UPLOAD_TIMEOUT_SECONDS) -> list:
+    """
+    Upload the files of one request concurrently on the upload pool
+
+    Args:
+        files: File objects to upload
+        timeout: Per-upload HTTP timeout in seconds
+
+    Returns:
+        The uploaded URLs, in the same order as `files`
+
+    Raises:
+        asyncio.TimeoutError: if any upload is still running after
+            UPLOAD_BACKSTOP_FACTOR times the timeout
+    """
+    loop = asyncio.get_running_loop()
+    uploader = _uploader
+
+    def timed_upload(file):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            url = uploader(file, timeout)
+            outcome = "ok"
+            return url
+        finally:
+            upload_latency.observe(time.perf_counter() - started, outcome)
+
+    async def upload_one(file):
+        return await asyncio.wait_for(
+            loop.run_in_executor(_executor, timed_upload, file), timeout * UPLOAD_BACKSTOP_FACTOR
+        )
+
+    return list(await asyncio.gather(*(upload_one(file) for file in files)))
@@ -0,0 +1,78 @@
+"""
+Lowercase user emails.
+
+Login, registration and the admin search match emails case-insensitively
+through `email_lower`, the lowercase copy of the email; the email itself is
+stored as typed. Users registered before that get `email_lower` from a
+startup migration, or by hand with:
+
+    python -m app.utils.user_emails check     # report only
+    python -m app.utils.user_emails backfill  # report, then update
+
+Two accounts whose emails differ only in case cannot share `email_lower`;
+they are reported and left without it, so they keep matching their exact
+email until an admin merges them.
+"""
+import asyncio
+import sys
+
+from pymongo import UpdateOne
+
+from app.models.user import normalize_email
+
+BATCH_SIZE = 1000
+
+async def backfill_user_emails(db, dry_run: bool = False) -> dict:
+    """
+    Set `email_lower` on every user that lacks it or has a stale one
+
+    Args:
+        db: Database handle
+        dry_run: Only count the users that would change
+
+    Returns:
+        Counts of users scanned and updated (or to update), plus the emails
+        left without `email_lower` because another account has the same
+        lowercase form
+    """
+    owners = {}
+    async for user in db["users"].find({}, {"email": 1, "email_lower": 1}):
+        owners.setdefault(normalize_email(user["email"]), []).append(user)
+
+    stats = {"users": 0, "updated": 0, "conflicts": []}
+    operations = []
+    for email_lower, users in owners.items():
+        stats["users"] += len(users)
+        if len(users) > 1:
+            stats["conflicts"].extend(user["email"] for user in users)
+            continue
+        user = users[0]
+        if user.get("email_lower") == email_lower:
+            continue
+        stats["updated"] += 1
+        if dry_run:
+            continue
+        operations.append(UpdateOne({"_id": user["_id"]}, {"$set": {"email_lower": email_lower}}))
+        if len(operations) == BATCH_SIZE:
+            await db["users"].bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db["users"].bulk_write(operations, ordered=False)
+    return stats
+
+async def main(command: str) -> int:
+    from app.config.database import db
+
+    if command not in ("check", "backfill"):
+        print(__doc__)
+        return 2
+
+    stats = await backfill_user_emails(db, dry_run=command == "check")
+    action = "need email_lower" if command == "check" else "got email_lower"
+    print(f"{stats['updated']} of {stats['users']} users {action}")
+    for email in stats["conflicts"]:
+        print(f"⚠️ {email} differs from another account only in case")
+    return 1 if (stats["updated"] and command == "check") or stats["conflicts"] else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "")))
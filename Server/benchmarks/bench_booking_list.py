@@ -0,0 +1,128 @@
+"""
+Round trips and latency of the booking list endpoints.
+
+Seeds N bookings spread over a fixed set of rooms and compares the old
+per-booking room lookup with GET /bookings/, driven through an in-process
+ASGI client.
+
+    python -m benchmarks.bench_booking_list --sizes 1000 10000 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import configure_environment, percentile
+
+counter = configure_environment()
+
+import httpx  # noqa: E402
+from bson import ObjectId  # noqa: E402
+from app.config.database import db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.routes.bookings import booking_serializer  # noqa: E402
+
+ROOM_COUNT = 200
+
+
+async def seed(size: int):
+    await db.rooms.delete_many({})
+    await db.bookings.delete_many({})
+
+    rooms = [
+        {
+            "roomNumber": str(100 + i),
+            "roomType": "Double",
+            "pricePerNight": 120.0,
+            "status": "Available",
+            "specialFeatures": [],
+            "images": [],
+        }
+        for i in range(ROOM_COUNT)
+    ]
+    result = await db.rooms.insert_many(rooms)
+    room_ids = [str(room_id) for room_id in result.inserted_ids]
+
+    start = datetime(2025, 1, 1)
+    batch = []
+    for i in range(size):
+        check_in = start + timedelta(days=i % 365)
+        batch.append({
+            "room_id": room_ids[i % ROOM_COUNT],
+            "room_number": rooms[i % ROOM_COUNT]["roomNumber"],
+            "room_type": "Double",
+            "price_per_night": 120.0,
+            "guest_name": f"Guest {i}",
+            "guest_email": f"guest{i % 5000}@example.com",
+            "guest_phone": "555-0100",
+            "guest_address": "1 Bench Street",
+            "check_in_date": check_in.strftime("%Y-%m-%d"),
+            "check_out_date": (check_in + timedelta(days=2)).strftime("%Y-%m-%d"),
+            "total_guests": 2,
+            "total_amount": 240.0,
+            "status": "Confirmed",
+            "special_requests": "",
+            "payment_method": "card",
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+        })
+        if len(batch) == 10000:
+            await db.bookings.insert_many(batch)
+            batch = []
+    if batch:
+        await db.bookings.insert_many(batch)
+
+
+async def legacy_get_all_bookings():
+    """The pre-batching implementation: one rooms.find_one per booking."""
+    bookings = []
+    async for booking in db.bookings.find().sort("created_at", -1):
+        room = await db.rooms.find_one({"_id": ObjectId(booking["room_id"])})
+        room_number = room["roomNumber"] if room else "Unknown"
+        bookings.append(booking_serializer(booking, room_number))
+    return {"success": True, "count": len(bookings), "data": bookings}
+
+
+async def measure(handler, iterations: int) -> dict:
+    latencies = []
+    round_trips = 0
+    for _ in range(iterations):
+        counter.reset()
+        started = time.perf_counter()
+        await handler()
+        latencies.append((time.perf_counter() - started) * 1000)
+        round_trips = counter.count
+    return {
+        "round_trips": round_trips,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--legacy-limit", type=int, default=10000,
+                        help="skip the N+1 baseline above this many bookings")
+    args = parser.parse_args()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def get_all_bookings():
+            response = await client.get("/bookings/")
+            response.raise_for_status()
+
+        for size in args.sizes:
+            await seed(size)
+            row = {"bookings": size, "batched": await measure(get_all_bookings, args.iterations)}
+            if size <= args.legacy_limit:
+                row["legacy"] = await measure(legacy_get_all_bookings, max(1, args.iterations // 5))
+            print(json.dumps(row))
+
+    await db.rooms.delete_many({})
+    await db.bookings.delete_many({})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
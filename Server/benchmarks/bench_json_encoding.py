@@ -0,0 +1,88 @@
+"""
+JSON encoding cost of a GET /bookings/ response.
+
+Compares FastAPI's default path (jsonable_encoder + JSONResponse) with
+FastJSONResponse on N serialized bookings. Needs no database.
+
+    python -m benchmarks.bench_json_encoding --rows 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.routes.bookings import booking_serializer
+from app.utils.responses import FastJSONResponse, orjson
+
+
+def make_payload(rows: int) -> dict:
+    start = datetime(2025, 1, 1)
+    bookings = []
+    for i in range(rows):
+        check_in = start + timedelta(days=i % 365)
+        bookings.append(booking_serializer({
+            "_id": ObjectId(),
+            "room_id": str(ObjectId()),
+            "guest_name": f"Guest {i}",
+            "guest_email": f"guest{i}@example.com",
+            "guest_phone": "555-0100",
+            "guest_address": "1 Bench Street",
+            "check_in_date": check_in.strftime("%Y-%m-%d"),
+            "check_out_date": (check_in + timedelta(days=2)).strftime("%Y-%m-%d"),
+            "total_guests": 2,
+            "total_amount": 240.0,
+            "status": "Confirmed",
+            "special_requests": "",
+            "payment_method": "card",
+            "created_at": (start + timedelta(minutes=i)).isoformat(),
+        }, str(100 + i % 200)))
+    return {"success": True, "count": len(bookings), "data": bookings, "next_cursor": None}
+
+
+def default_path(payload) -> bytes:
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fast_path(payload) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def measure(encode, payload, iterations: int) -> dict:
+    body = encode(payload)
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    for _ in range(iterations):
+        encode(payload)
+    wall = time.perf_counter() - wall_started
+    cpu = time.process_time() - cpu_started
+    return {
+        "bytes": len(body),
+        "cpu_ms_per_request": round(cpu / iterations * 1000, 2),
+        "mb_per_sec": round(len(body) * iterations / wall / 1_000_000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    payload = make_payload(args.rows)
+    before = measure(default_path, payload, args.iterations)
+    after = measure(fast_path, payload, args.iterations)
+    print(json.dumps({
+        "rows": args.rows,
+        "encoder": "orjson" if orjson is not None else "json",
+        "before": before,
+        "after": after,
+        "speedup": round(before["cpu_ms_per_request"] / max(after["cpu_ms_per_request"], 0.01), 1),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+/rooms/ latency while a burst of logins hits the bcrypt pool.
+
+Measures /rooms/ p50/p99 first on an idle server, then while N concurrent
+logins are in flight, driving the real app through an in-process ASGI client.
+
+    python -m benchmarks.bench_login_isolation --logins 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure_environment, percentile
+
+configure_environment()
+
+import httpx  # noqa: E402
+from app.config.database import db  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.passwords import hash_password, pool_stats  # noqa: E402
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-password"
+
+
+async def seed():
+    await db.users.delete_many({"email": EMAIL})
+    await db.users.insert_one({
+        "name": "Bench",
+        "email": EMAIL,
+        "password": await hash_password(PASSWORD),
+        "role": "user",
+        "is_banned": False,
+    })
+    if await db.rooms.count_documents({}) == 0:
+        await db.rooms.insert_many([
+            {"roomNumber": str(100 + i), "roomType": "Double", "pricePerNight": 120.0,
+             "status": "Available", "specialFeatures": [], "images": []}
+            for i in range(50)
+        ])
+
+
+async def sample_rooms(client, stop: asyncio.Event) -> list:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/rooms/")
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def run_phase(client, logins: int) -> dict:
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rooms(client, stop))
+    statuses = {}
+    if logins:
+        responses = await asyncio.gather(*(
+            client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            for _ in range(logins)
+        ))
+        for response in responses:
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    else:
+        await asyncio.sleep(2)
+    stop.set()
+    latencies = await sampler
+    return {
+        "logins": logins,
+        "login_statuses": statuses,
+        "rooms_samples": len(latencies),
+        "rooms_p50_ms": round(percentile(latencies, 50), 2),
+        "rooms_p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    await seed()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(json.dumps({"phase": "idle", **await run_phase(client, 0)}))
+        print(json.dumps({"phase": "login_burst", **await run_phase(client, args.logins),
+                          "password_pool": pool_stats()}))
+    await db.users.delete_many({"email": EMAIL})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+"""
+Shared helpers for the benchmark scripts.
+
+The benchmarks talk to a real MongoDB. Point them at a throwaway database:
+
+    MONGO_URI=mongodb://localhost:27017 BENCH_DB_NAME=luxstay_bench python -m benchmarks.<script>
+
+The environment has to be prepared before anything under ``app`` is imported,
+because ``app.config.database`` builds its client at import time.
+"""
+import os
+import threading
+
+from pymongo import monitoring
+
+BENCH_MONGO_URI = os.getenv("BENCH_MONGO_URI", "mongodb://localhost:27017")
+BENCH_DB_NAME = os.getenv("BENCH_DB_NAME", "luxstay_bench")
+
+
+class CommandCounter(monitoring.CommandListener):
+    """
+    Counts the commands (round trips) sent to MongoDB
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def reset(self):
+        with self._lock:
+            self.count = 0
+
+    def started(self, event):
+        with self._lock:
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def configure_environment():
+    """
+    Point the app at the benchmark database and register a command counter
+
+    Returns:
+        The registered CommandCounter
+    """
+    os.environ["MONGO_URI"] = BENCH_MONGO_URI
+    os.environ["DB_NAME"] = BENCH_DB_NAME
+    # Keep per-request logging out of the measurements and the JSON output
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    counter = CommandCounter()
+    monitoring.register(counter)
+    return counter
+
+
+def percentile(samples, pct: float) -> float:
+    """
+    Nearest-rank percentile of a list of samples
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def latency_summary(samples_ms) -> dict:
+    """
+    p50/p95/p99/max of latency samples in milliseconds
+    """
+    return {
+        "p50_ms": round(percentile(samples_ms, 50), 2),
+        "p95_ms": round(percentile(samples_ms, 95), 2),
+        "p99_ms": round(percentile(samples_ms, 99), 2),
+        "max_ms": round(max(samples_ms), 2) if samples_ms else 0.0,
+    }
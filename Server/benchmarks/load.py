@@ -0,0 +1,223 @@
+"""
+Load test of the hot API endpoints.
+
+Seeds the benchmark database (optional), then runs each scenario in turn
+with N concurrent closed-loop clients for a fixed duration and reports
+throughput, latency percentiles and MongoDB round trips per request as
+JSON. Compare the output files of two commits to spot regressions.
+
+By default the real app is driven in-process through an ASGI client. Pass
+--base-url to load a running server instead (it has to use the same
+database, since the scenarios pick ids from it).
+
+    python -m benchmarks.load --seed-data --bookings 50000 --concurrency 32 \\
+        --duration 10 --output results.json
+
+Scenarios: login, rooms_available, create_booking, list_bookings, update_booking
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import subprocess
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import configure_environment, latency_summary
+from benchmarks.seed import BENCH_PASSWORD, add_volume_arguments, seed, user_email
+
+counter = configure_environment()
+
+import httpx  # noqa: E402
+from app.config.database import db  # noqa: E402
+from app.config.indexes import ensure_indexes  # noqa: E402
+from app.main import app  # noqa: E402
+from app.utils.availability import availability  # noqa: E402
+
+
+async def load_context() -> dict:
+    """Ids and dates the scenarios draw from"""
+    # Seeded users are numbered 0..N-1
+    users = await db.users.count_documents({})
+    rooms = [str(room["_id"]) async for room in db.rooms.find({}, {"_id": 1}).sort("roomNumber", 1)]
+    if not rooms:
+        raise SystemExit("The benchmark database has no rooms; run with --seed-data first")
+    active = [
+        str(booking["_id"]) async for booking in db.bookings.find(
+            {"status": {"$in": ["Pending", "Confirmed"]}}, {"_id": 1}
+        ).limit(10000)
+    ]
+    latest = await db.bookings.find({}, {"check_out_date": 1}).sort("check_out_date", -1).limit(1).to_list(length=1)
+    free_from = date.fromisoformat(latest[0]["check_out_date"]) if latest else date.today()
+    return {
+        "users": max(users, 1),
+        "rooms": rooms,
+        "active_bookings": active,
+        # New bookings go after every seeded stay, so they never conflict
+        "free_from": max(free_from, date.today()) + timedelta(days=30),
+        "status_toggle": {},
+    }
+
+
+def build_login(ctx, rng, seq):
+    return "POST", "/auth/login", {"email": user_email(rng.randrange(ctx["users"])), "password": BENCH_PASSWORD}
+
+
+def build_rooms_available(ctx, rng, seq):
+    check_in = date.today() + timedelta(days=rng.randrange(1, 300))
+    check_out = check_in + timedelta(days=rng.randrange(1, 6))
+    return "GET", f"/rooms/available?check_in={check_in}&check_out={check_out}&guests={rng.randrange(1, 4)}", None
+
+
+def build_create_booking(ctx, rng, seq):
+    # Each sequence number gets its own room and two nights: no conflicts
+    rooms = ctx["rooms"]
+    check_in = ctx["free_from"] + timedelta(days=3 * (seq // len(rooms)))
+    return "POST", "/bookings/", {
+        "room_id": rooms[seq % len(rooms)],
+        "guest_name": "Load Guest",
+        "guest_email": user_email(seq % ctx["users"]),
+        "guest_phone": "555-0100",
+        "guest_address": "1 Load Street",
+        "check_in_date": check_in.isoformat(),
+        "check_out_date": (check_in + timedelta(days=2)).isoformat(),
+        "total_guests": 1,
+        "payment_method": "card",
+    }
+
+
+def build_list_bookings(ctx, rng, seq):
+    return "GET", "/bookings/?limit=50", None
+
+
+def build_update_booking(ctx, rng, seq):
+    # Toggle between two active statuses so the dataset stays unchanged
+    booking_id = ctx["active_bookings"][seq % len(ctx["active_bookings"])]
+    status = "Pending" if ctx["status_toggle"].get(booking_id) == "Confirmed" else "Confirmed"
+    ctx["status_toggle"][booking_id] = status
+    return "PUT", f"/bookings/{booking_id}", {"status": status}
+
+
+SCENARIOS = {
+    "login": build_login,
+    "rooms_available": build_rooms_available,
+    "create_booking": build_create_booking,
+    "list_bookings": build_list_bookings,
+    "update_booking": build_update_booking,
+}
+
+
+async def run_scenario(client, name: str, ctx: dict, concurrency: int, duration: float, warmup: float,
+                       seed_value: int) -> dict:
+    build = SCENARIOS[name]
+    sequence = itertools.count()
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+    latencies = []
+    statuses = {}
+    total_requests = 0
+
+    async def worker(worker_id: int):
+        nonlocal total_requests
+        rng = random.Random(f"{seed_value}:{name}:{worker_id}")
+        while loop.time() < stop_at:
+            method, path, body = build(ctx, rng, next(sequence))
+            sent_at = loop.time()
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            total_requests += 1
+            if sent_at >= measure_from:
+                latencies.append(elapsed_ms)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    counter.reset()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / duration, 1),
+        **latency_summary(latencies),
+        "mongo_commands_per_request": round(counter.count / total_requests, 2) if total_requests else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_volume_arguments(parser)
+    parser.add_argument("--seed-data", action="store_true", help="wipe and reseed the benchmark database first")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--base-url", help="load a running server instead of the in-process app")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios {unknown}; choose from {list(SCENARIOS)}")
+
+    dataset = await seed(db, args.users, args.rooms, args.bookings, args.seed) if args.seed_data else None
+    ctx = await load_context()
+    if "update_booking" in names and not ctx["active_bookings"]:
+        parser.error("no Pending or Confirmed bookings to update; seed more bookings")
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        # The lifespan (and its scheduler) is not run; prepare what it would
+        await ensure_indexes(db)
+        await availability.load(db)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    report = {
+        "git_commit": git_commit(),
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "target": args.base_url or "asgi",
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "seed": args.seed,
+        },
+        "dataset": dataset or {
+            "users": ctx["users"],
+            "rooms": len(ctx["rooms"]),
+            "bookings": await db.bookings.count_documents({}),
+        },
+        "scenarios": {},
+    }
+    async with client:
+        for name in names:
+            report["scenarios"][name] = await run_scenario(
+                client, name, ctx, args.concurrency, args.duration, args.warmup, args.seed
+            )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Concurrency check for booking creation.
+
+Fires N simultaneous POST /bookings/ for the same room-night through an
+in-process ASGI client and verifies that exactly one of them wins.
+
+    python -m benchmarks.race_booking --requests 500
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from benchmarks.common import configure_environment
+
+counter = configure_environment()
+
+import httpx  # noqa: E402
+from app.config.database import db  # noqa: E402
+from app.main import app  # noqa: E402
+
+ROOM_NUMBER = "race-room"
+
+
+async def seed() -> str:
+    room = await db.rooms.find_one({"roomNumber": ROOM_NUMBER})
+    if room:
+        await db.bookings.delete_many({"room_id": str(room["_id"])})
+        await db.room_nights.delete_many({"room_id": str(room["_id"])})
+        await db.rooms.delete_one({"_id": room["_id"]})
+    result = await db.rooms.insert_one({
+        "roomNumber": ROOM_NUMBER,
+        "roomType": "Double",
+        "pricePerNight": 100.0,
+        "status": "Available",
+        "specialFeatures": [],
+        "images": [],
+    })
+    return str(result.inserted_id)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    room_id = await seed()
+    payload = {
+        "room_id": room_id,
+        "guest_name": "Race Guest",
+        "guest_email": "race@example.com",
+        "guest_phone": "555-0100",
+        "guest_address": "1 Race Street",
+        "check_in_date": "2030-06-01",
+        "check_out_date": "2030-06-02",
+        "total_guests": 2,
+        "payment_method": "card",
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        counter.reset()
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/bookings/", json=payload) for _ in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for response in responses:
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    stored = await db.bookings.count_documents({"room_id": room_id})
+    report = {
+        "requests": args.requests,
+        "statuses": statuses,
+        "bookings_stored": stored,
+        "round_trips": counter.count,
+        "elapsed_s": round(elapsed, 3),
+        "ok": statuses.get(200, 0) == 1 and stored == 1,
+    }
+    print(json.dumps(report))
+
+    await db.bookings.delete_many({"room_id": room_id})
+    await db.room_nights.delete_many({"room_id": room_id})
+    await db.rooms.delete_one({"roomNumber": ROOM_NUMBER})
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,179 @@
+"""
+Seed the benchmark database with users, rooms and bookings.
+
+Volumes are configurable and the data is deterministic for a given --seed
+(dates are relative to today), so two commits are compared on the same
+dataset. Every existing document in the benchmark collections is deleted
+first. Room-night claims and counters are rebuilt from the seeded bookings,
+and the app's indexes are created.
+
+Needs a MongoDB the benchmarks may wipe, for example a throwaway container:
+
+    docker run --rm -d -p 27017:27017 --name luxstay-bench mongo:7
+    python -m benchmarks.seed --users 1000 --rooms 200 --bookings 50000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from benchmarks.common import configure_environment
+
+SEEDED_COLLECTIONS = ("users", "rooms", "bookings", "room_nights", "booking_counters")
+ROOM_TYPES = (("Single", 80.0), ("Double", 120.0), ("Deluxe", 180.0), ("Suite", 260.0))
+FEATURES = ("Sea View", "Balcony", "Bathtub", "Kitchenette", "Workspace", "Minibar")
+BENCH_PASSWORD = "bench-password"
+BATCH_SIZE = 5000
+
+
+def user_email(index: int) -> str:
+    return f"bench-user-{index}@example.com"
+
+
+def make_rooms(rng: random.Random, count: int) -> list:
+    rooms = []
+    for i in range(count):
+        room_type, price = ROOM_TYPES[i % len(ROOM_TYPES)]
+        rooms.append({
+            "roomNumber": str(1000 + i),
+            "roomType": room_type,
+            "pricePerNight": price + rng.randrange(0, 40),
+            "status": "Available",
+            "specialFeatures": rng.sample(FEATURES, rng.randrange(0, 4)),
+            "images": [],
+        })
+    return rooms
+
+
+def stay_status(rng: random.Random, check_in: date, check_out: date, today: date) -> str:
+    if rng.random() < 0.1:
+        return "Cancelled"
+    if check_out <= today:
+        return "Checked Out"
+    if check_in <= today:
+        return "Checked In"
+    return "Confirmed" if rng.random() < 0.7 else "Pending"
+
+
+def make_bookings(rng: random.Random, rooms: list, count: int, users: int) -> list:
+    """
+    Non-overlapping stays, spread evenly over the rooms, with about half of
+    each room's history in the past and half in the future
+    """
+    today = date.today()
+    per_room = max(1, -(-count // len(rooms)))
+    # A stay averages 2.5 nights after a 1 day gap
+    first_night = today - timedelta(days=int(per_room * 3.5 / 2))
+    bookings = []
+    for room in rooms:
+        night = first_night
+        for _ in range(per_room):
+            if len(bookings) == count:
+                return bookings
+            check_in = night + timedelta(days=rng.randrange(0, 3))
+            nights = rng.randrange(1, 5)
+            check_out = check_in + timedelta(days=nights)
+            night = check_out
+            guest = rng.randrange(users) if users else 0
+            created_at = datetime.combine(check_in, datetime.min.time()) - timedelta(
+                days=rng.randrange(1, 60), seconds=rng.randrange(86400)
+            )
+            bookings.append({
+                "room_id": str(room["_id"]),
+                "room_number": room["roomNumber"],
+                "room_type": room["roomType"],
+                "price_per_night": room["pricePerNight"],
+                "guest_name": f"Bench Guest {guest}",
+                "guest_email": user_email(guest),
+                "guest_phone": "555-0100",
+                "guest_address": "1 Bench Street",
+                "check_in_date": check_in.isoformat(),
+                "check_out_date": check_out.isoformat(),
+                "total_guests": rng.randrange(1, 3),
+                "special_requests": None,
+                "payment_method": "card",
+                "total_amount": nights * room["pricePerNight"],
+                "status": stay_status(rng, check_in, check_out, today),
+                "created_at": created_at.isoformat(),
+            })
+    return bookings
+
+
+async def insert_batches(collection, documents: list):
+    for start in range(0, len(documents), BATCH_SIZE):
+        await collection.insert_many(documents[start:start + BATCH_SIZE], ordered=False)
+
+
+async def seed(db, users: int, rooms: int, bookings: int, seed_value: int = 42) -> dict:
+    """
+    Replace the benchmark collections with a generated dataset
+
+    Returns:
+        Counts of the seeded documents and the time taken
+    """
+    from app.config.indexes import ensure_indexes
+    from app.utils.counters import rebuild_counters
+    from app.utils.passwords import hash_password
+    from app.utils.reservations import backfill_claims
+
+    rng = random.Random(seed_value)
+    started = time.perf_counter()
+    for name in SEEDED_COLLECTIONS:
+        await db[name].delete_many({})
+    await ensure_indexes(db)
+
+    # One hash shared by every user keeps seeding fast; login cost is the same
+    password = await hash_password(BENCH_PASSWORD)
+    await insert_batches(db.users, [
+        {
+            "name": f"Bench User {i}",
+            "email": user_email(i),
+            "password": password,
+            "role": "admin" if i == 0 else "user",
+            "is_banned": False,
+            "ban_reason": None,
+            "banned_at": None,
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(users)
+    ])
+
+    room_docs = make_rooms(rng, rooms)
+    await insert_batches(db.rooms, room_docs)
+    booking_docs = make_bookings(rng, room_docs, bookings, users) if room_docs else []
+    await insert_batches(db.bookings, booking_docs)
+
+    claims = await backfill_claims(db)
+    counters = await rebuild_counters(db)
+    return {
+        "users": users,
+        "rooms": len(room_docs),
+        "bookings": len(booking_docs),
+        "claims": claims["claimed"],
+        "counters": counters["counters"],
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def add_volume_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--rooms", type=int, default=200)
+    parser.add_argument("--bookings", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    configure_environment()
+    from app.config.database import db
+
+    print(json.dumps(await seed(db, args.users, args.rooms, args.bookings, args.seed)))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
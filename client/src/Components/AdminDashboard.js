@@ -8,6 +8,9 @@ function AdminDashboard() {
   const [rooms, setRooms] = useState([]);
   const [bookings, setBookings] = useState([]);
   const [users, setUsers] = useState([]);
+  const [usersCursor, setUsersCursor] = useState(null);
+  const [totalUsers, setTotalUsers] = useState(null);
+  const [userSearch, setUserSearch] = useState("");
   const [activeTab, setActiveTab] = useState("overview");
   const [sidebarOpen, setSidebarOpen] = useState(false);
   const [adminData, setAdminData] = useState(null);
@@ -46,6 +49,7 @@ function AdminDashboard() {
     fetchRooms();
     fetchBookings();
     fetchUsers();
+    fetchUserCount();
   }, [navigate]);
 
   const handleLogout = () => {
@@ -87,22 +91,45 @@ function AdminDashboard() {
     }
   };
 
-  const fetchUsers = async () => {
+  // Users are paged by the API: the next page's cursor comes back in the
+  // X-Next-Cursor header and "Load more" appends that page
+  const fetchUsers = async ({ append = false } = {}) => {
     try {
       const token = localStorage.getItem("token");
-      const res = await fetch(`${API_BASE_URL}/auth/users`, {
+      const params = new URLSearchParams({ limit: "50" });
+      if (userSearch.trim()) params.set("q", userSearch.trim());
+      if (append && usersCursor) params.set("cursor", usersCursor);
+      const res = await fetch(`${API_BASE_URL}/auth/users?${params}`, {
         headers: {
           'Authorization': `Bearer ${token}`
         }
       });
       const data = await res.json();
-      setUsers(data || []);
+      const page = Array.isArray(data) ? data : [];
+      setUsers(append ? (prev) => [...prev, ...page] : page);
+      setUsersCursor(res.headers.get("X-Next-Cursor"));
     } catch (err) {
       console.error(err);
       alert("Error fetching users");
     }
   };
 
+  // The user list is paged, so the total comes from the stats endpoint
+  const fetchUserCount = async () => {
+    try {
+      const token = localStorage.getItem("token");
+      const res = await fetch(`${API_BASE_URL}/admin/stats`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        }
+      });
+      const data = await res.json();
+      setTotalUsers(data.data?.users?.total ?? null);
+    } catch (err) {
+      console.error("Error fetching user count:", err);
+    }
+  };
+
   const handleChange = (e) => {
     setFormData({ ...formData, [e.target.name]: e.target.value });
   };
@@ -424,7 +451,7 @@ function AdminDashboard() {
                     </div>
                   </div>
                   <div style={styles.statContent}>
-                    <div style={styles.statNumber}>{users.length}</div>
+                    <div style={styles.statNumber}>{totalUsers ?? users.length}</div>
                     <div style={styles.statLabel}>Total Users</div>
                   </div>
                 </div>
@@ -621,7 +648,20 @@ function AdminDashboard() {
               </div>
 
               <div style={styles.card}>
-                <h3 style={styles.cardTitle}>All Users ({users.length})</h3>
+                <h3 style={styles.cardTitle}>All Users ({totalUsers ?? users.length})</h3>
+                <form
+                  onSubmit={(e) => { e.preventDefault(); fetchUsers(); }}
+                  style={styles.userSearchForm}
+                >
+                  <input
+                    type="text"
+                    placeholder="Search by email or name prefix"
+                    value={userSearch}
+                    onChange={(e) => setUserSearch(e.target.value)}
+                    style={styles.input}
+                  />
+                  <button type="submit" style={styles.primaryButton}>Search</button>
+                </form>
                 <div style={styles.tableContainer}>
                   <table style={styles.table}>
                     <thead>
@@ -667,6 +707,11 @@ function AdminDashboard() {
                     </tbody>
                   </table>
                 </div>
+                {usersCursor && (
+                  <button onClick={() => fetchUsers({ append: true })} style={styles.loadMoreButton}>
+                    Load more
+                  </button>
+                )}
               </div>
             </>
           )}
@@ -1252,6 +1297,21 @@ const styles = {
     fontSize: "0.8rem",
     fontWeight: "bold",
   },
+  userSearchForm: {
+    display: "flex",
+    gap: "12px",
+    marginBottom: "18px",
+  },
+  loadMoreButton: {
+    marginTop: "18px",
+    background: "white",
+    color: "#0FA3B1",
+    border: "2px solid #0FA3B1",
+    padding: "10px 20px",
+    borderRadius: "8px",
+    cursor: "pointer",
+    fontWeight: "600",
+  },
   banButton: {
     background: "linear-gradient(135deg, #E74C3C 0%, #C0392B 100%)",
     color: "white",
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
 import API_BASE_URL from "../Utils/api";
 
@@ -7,6 +7,9 @@ function BookingForm() {
   const navigate = useNavigate();
   
   const [room, setRoom] = useState(null);
+  // Resubmitting the same booking reuses its Idempotency-Key, so a retry
+  // after a dropped response cannot create a second booking
+  const idempotency = useRef({ body: null, key: null });
   const [loading, setLoading] = useState(true);
   const [submitting, setSubmitting] = useState(false);
   const [userEmail, setUserEmail] = useState('');
@@ -48,16 +51,15 @@ function BookingForm() {
 
   const fetchRoomDetails = async () => {
     try {
-      const response = await fetch(`${API_BASE_URL}/rooms/`);
+      const response = await fetch(
+        `${API_BASE_URL}/rooms/${roomId}?fields=roomNumber,roomType,pricePerNight,specialFeatures,images`
+      );
       if (response.ok) {
         const data = await response.json();
-        const selectedRoom = data.data.find(room => room.id === roomId);
-        if (selectedRoom) {
-          setRoom(selectedRoom);
-        } else {
-          alert('Room not found');
-          navigate('/rooms');
-        }
+        setRoom(data.data);
+      } else if (response.status === 404 || response.status === 400) {
+        alert('Room not found');
+        navigate('/rooms');
       } else {
         alert('Error fetching room details');
       }
@@ -170,12 +172,18 @@ function BookingForm() {
         total_amount: calculateTotalAmount()
       };
 
+      const body = JSON.stringify(bookingData);
+      if (idempotency.current.body !== body) {
+        idempotency.current = { body, key: crypto.randomUUID() };
+      }
+
       const response = await fetch(`${API_BASE_URL}/bookings/`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
+          'Idempotency-Key': idempotency.current.key,
         },
-        body: JSON.stringify(bookingData)
+        body
       });
 
       if (response.ok) {